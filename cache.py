@@ -0,0 +1,188 @@
+from cachetools import Cache, TTLCache
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+from models import Plan, Production, InventoryManagement, Material, MaterialInvenManagement
+import orjson
+import os
+
+load_dotenv()
+# 분석 API 응답 캐시 (기본은 프로세스 메모리, CACHE_URL에 redis 주소가 있으면 여러 워커가 공유)
+# 조회/저장/무효화는 모두 이벤트 루프에서 await (redis는 redis.asyncio 사용)
+CACHE_TTL = int(os.getenv("CACHE_TTL", "300"))
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "1024"))
+CACHE_URL = os.getenv("CACHE_URL")
+
+# 캐시 항목은 (테이블, 연도, 월) 의존성 목록을 가짐
+# 연도/월이 None이면 그 테이블 전체(또는 그 해 전체)에 의존
+def matches(dependency, changed):
+    table, year, month = dependency
+    return table == changed[0] and (year is None or year == changed[1]) and (month is None or month == changed[2])
+
+class CountingTTLCache(TTLCache):
+    def __init__(self, maxsize, ttl, stats):
+        super().__init__(maxsize, ttl)
+        self.stats = stats
+
+    def popitem(self):
+        item = super().popitem()
+        self.stats["evictions"] += 1
+        return item
+
+    # TTLCache.currsize는 내부에서 expire를 다시 부르므로 Cache 기준 크기를 사용
+    def expire(self, time=None):
+        before = Cache.currsize.fget(self)
+        super().expire(time)
+        self.stats["expirations"] += before - Cache.currsize.fget(self)
+
+class MemoryBackend:
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: int, stats: dict):
+        self.entries = CountingTTLCache(maxsize, ttl, stats)
+
+    async def get(self, key: str):
+        entry = self.entries.get(key)
+        return entry[0] if entry else None
+
+    async def set(self, key: str, value, dependencies):
+        self.entries[key] = (value, dependencies)
+
+    async def invalidate(self, changed_keys):
+        removed = 0
+        for key, (_, dependencies) in list(self.entries.items()):
+            if any(matches(dependency, changed) for dependency in dependencies for changed in changed_keys):
+                self.entries.pop(key, None)
+                removed += 1
+        return removed
+
+    def size(self):
+        return len(self.entries)
+
+# redis 공유 캐시: 값은 TTL과 함께 저장하고, 의존성별 set에 키를 모아두었다가 무효화할 때 같이 삭제
+class RedisBackend:
+    name = "redis"
+    prefix = "de:cache:"
+
+    def __init__(self, url: str, ttl: int):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_URL is set but the redis package is not installed") from e
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def dependency_key(self, table, year, month):
+        return f"{self.prefix}dep:{table}:{'*' if year is None else year}:{'*' if month is None else month}"
+
+    async def get(self, key: str):
+        value = await self.client.get(self.prefix + key)
+        return orjson.loads(value) if value is not None else None
+
+    async def set(self, key: str, value, dependencies):
+        async with self.client.pipeline() as pipe:
+            pipe.setex(self.prefix + key, self.ttl, orjson.dumps(value))
+            for dependency in dependencies:
+                dependency_key = self.dependency_key(*dependency)
+                pipe.sadd(dependency_key, self.prefix + key)
+                pipe.expire(dependency_key, self.ttl)
+            await pipe.execute()
+
+    async def invalidate(self, changed_keys):
+        dependency_keys = set()
+        for table, year, month in changed_keys:
+            dependency_keys.update((
+                self.dependency_key(table, None, None),
+                self.dependency_key(table, year, None),
+                self.dependency_key(table, year, month),
+            ))
+        keys = set()
+        for dependency_key in dependency_keys:
+            keys.update(await self.client.smembers(dependency_key))
+        if keys or dependency_keys:
+            await self.client.delete(*keys, *dependency_keys)
+        return len(keys)
+
+    def size(self):
+        return None
+
+class ResponseCache:
+    def __init__(self):
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        # 무효화할 때마다 증가 (계산 중에 데이터가 바뀐 결과는 저장하지 않기 위해 사용)
+        self.generation = 0
+        self.backend = RedisBackend(CACHE_URL, CACHE_TTL) if CACHE_URL else MemoryBackend(CACHE_MAXSIZE, CACHE_TTL, self.stats)
+
+    def make_key(self, route: str, params: dict):
+        return route + ":" + orjson.dumps(params, option=orjson.OPT_SORT_KEYS).decode()
+
+    async def get(self, key: str):
+        value = await self.backend.get(key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    async def set(self, key: str, value, dependencies, generation: int):
+        if generation == self.generation:
+            await self.backend.set(key, value, dependencies)
+
+    async def invalidate(self, changed_keys):
+        self.generation += 1
+        self.stats["invalidations"] += await self.backend.invalidate(changed_keys)
+
+    # 쓰기 요청의 세션에서 commit된 키를 무효화 (main의 쓰기 세션 의존성이 응답 전에 호출)
+    async def invalidate_committed(self, session):
+        keys = session.info.pop(COMMITTED, None)
+        if keys:
+            await self.invalidate(keys)
+
+    def status(self):
+        return {"backend": self.backend.name, "ttl": CACHE_TTL, "size": self.backend.size(), **self.stats}
+
+response_cache = ResponseCache()
+
+# crud의 파생 테이블 갱신 흐름에 붙어서 바뀐 (테이블, 연도, 월)을 모아두었다가 commit 후에 무효화
+# commit 훅(동기)에서는 네트워크 호출 없이 commit된 키만 옮겨두고, 실제 무효화는 요청이 끝날 때 await
+SOURCES = (Plan, Production, InventoryManagement, Material, MaterialInvenManagement)
+PENDING = "cache_invalidations"
+COMMITTED = "cache_committed_invalidations"
+
+def key_columns(model):
+    if model is Plan:
+        return [Plan.year, Plan.month]
+    return [func.extract("year", model.date), func.extract("month", model.date)]
+
+def keys_for_rows(model, rows):
+    table = model.__tablename__
+    if model is Plan:
+        return {(table, row["year"], row["month"]) for row in rows}
+    return {(table, row["date"].year, row["date"].month) for row in rows if row.get("date")}
+
+def keys_for_query(db: Session, model, conditions: list, lock: bool = False):
+    table = model.__tablename__
+    stmt = select(*key_columns(model)).where(*conditions).distinct()
+    rows = db.execute(stmt.with_for_update() if lock else stmt)
+    return {(table, int(year), int(month)) for year, month in rows if year is not None}
+
+def keys_after_update(model, keys: set, changes: dict):
+    result = set()
+    for table, year, month in keys:
+        if model is Plan:
+            year, month = changes.get("year") or year, changes.get("month") or month
+        elif changes.get("date") is not None:
+            year, month = changes["date"].year, changes["date"].month
+        result.add((table, year, month))
+    return result
+
+def refresh(db: Session, keys: set):
+    if keys:
+        db.info.setdefault(PENDING, set()).update(keys)
+
+@event.listens_for(Session, "after_commit")
+def collect_after_commit(session):
+    keys = session.info.pop(PENDING, None)
+    if keys:
+        session.info.setdefault(COMMITTED, set()).update(keys)
+
+@event.listens_for(Session, "after_rollback")
+def discard_after_rollback(session):
+    session.info.pop(PENDING, None)
@@ -0,0 +1,93 @@
+from sqlalchemy import select, insert, func, event
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from datetime import datetime
+from models import Plan, Production, InventoryManagement, Material, MaterialInOutManagement, MaterialInvenManagement, ChangeLog, ChangeLogLock
+
+# 변경 기록은 쓰기 중에는 session.info에 모아 두고 commit 직전에 잠금 행(change_log_locks)을 잡고 insert
+# 잠금은 commit 때 풀리므로 change_idx가 commit 순서대로 할당됨
+# → 어떤 번호가 보이면 그보다 작은 번호를 받은 트랜잭션은 이미 끝났으므로 비어 있는 번호는 다시 채워지지 않음
+#   (트랜잭션이 오래 열려 있어도 그 변경을 건너뛰지 않음)
+PENDING = "change_log_pending"
+LOCK_IDX = 1
+
+TABLES = {model.__tablename__: model for model in (Plan, Production, InventoryManagement, Material, MaterialInOutManagement, MaterialInvenManagement)}
+
+# 쓰기와 같은 트랜잭션에서 변경 기록 (operation: insert, update, delete)
+def record(db: Session, model, ids, operation: str):
+    table_name = model.__tablename__
+    if table_name not in TABLES or not ids:
+        return
+    db.info.setdefault(PENDING, []).extend((table_name, row_id, operation) for row_id in ids)
+
+# 잠금 행이 없으면 만들고 FOR UPDATE로 잠금 (sqlite는 쓰기 트랜잭션이 하나씩이라 순서가 같음)
+def lock(db: Session):
+    table = ChangeLogLock.__table__
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "mysql":
+        stmt = mysql_insert(table).values(lock_idx=LOCK_IDX)
+        stmt = stmt.on_duplicate_key_update(lock_idx=stmt.table.c.lock_idx)
+    elif dialect_name == "sqlite":
+        stmt = sqlite_insert(table).values(lock_idx=LOCK_IDX).on_conflict_do_nothing(index_elements=["lock_idx"])
+    else:
+        raise ValueError(f"upsert not supported for '{dialect_name}'")
+    db.execute(stmt)
+    db.execute(select(table.c.lock_idx).where(table.c.lock_idx == LOCK_IDX).with_for_update())
+
+@event.listens_for(Session, "before_commit")
+def write_before_commit(session):
+    entries = session.info.pop(PENDING, None)
+    if not entries:
+        return
+    lock(session)
+    changed_at = datetime.now()
+    session.execute(insert(ChangeLog.__table__), [
+        {"table_name": table_name, "row_id": row_id, "operation": operation, "changed_at": changed_at}
+        for table_name, row_id, operation in entries
+    ])
+
+@event.listens_for(Session, "after_rollback")
+def discard_after_rollback(session):
+    session.info.pop(PENDING, None)
+
+# 첫 동기화 시작 위치 (commit된 마지막 번호)
+def head(db: Session):
+    return db.execute(select(func.max(ChangeLog.change_idx))).scalar() or 0
+
+# since 이후 변경분을 순서대로 최대 limit건 반환 (같은 행이 여러 번 바뀌었으면 마지막 변경만, 현재 행 값 포함)
+def get_changes(db: Session, since: int, limit: int, tables=None):
+    entries = db.execute(
+        select(ChangeLog.change_idx, ChangeLog.table_name, ChangeLog.row_id, ChangeLog.operation)
+        .where(ChangeLog.change_idx > since)
+        .order_by(ChangeLog.change_idx)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    position = entries[-1].change_idx if entries else since
+
+    latest = {}
+    for entry in entries:
+        if tables and entry.table_name not in tables:
+            continue
+        key = (entry.table_name, entry.row_id)
+        latest.pop(key, None)
+        latest[key] = entry
+    ordered = sorted(latest.values(), key=lambda entry: entry.change_idx)
+
+    rows = {}
+    for table_name in {entry.table_name for entry in ordered if entry.operation != "delete"}:
+        model = TABLES[table_name]
+        pk = model.__mapper__.primary_key[0]
+        ids = [entry.row_id for entry in ordered if entry.table_name == table_name and entry.operation != "delete"]
+        for row in db.execute(select(*model.__table__.columns).where(pk.in_(ids))):
+            rows[(table_name, getattr(row, pk.name))] = row._asdict()
+
+    result = []
+    for entry in ordered:
+        row = rows.get((entry.table_name, entry.row_id))
+        # 나중에 삭제된 행은 삭제로 전달
+        operation = entry.operation if row is not None or entry.operation == "delete" else "delete"
+        result.append({"table": entry.table_name, "id": entry.row_id, "operation": operation, "row": row if operation != "delete" else None})
+    return {"changes": result, "last": position, "has_more": has_more}
@@ -1,18 +1,417 @@
 from sqlalchemy.orm import Session
-from models import Plan, Production, InventoryManagement, Material, MaterialPlan, MaterialInven, MaterialInOutManagement, MaterialInvenManagement, ProductionPlanSummary, FacilityStatus
+from pydantic import BaseModel
+from models import Plan, Production, InventoryManagement, Material, MaterialPlan, MaterialInven, MaterialInOutManagement, MaterialInvenManagement, ProductionPlanSummary, FacilityStatus, ItemPrice, Forecast
 import schemas
-from sqlalchemy import extract, func, desc
-from typing import List
-from datetime import datetime, timedelta
-import pandas as pd
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-
-#기간 계산 함수
-def get_month_range(year: int, month: int):
-    start_date = datetime(year, month, 1)
-    end_date = (start_date + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+import summaries
+import item_prices
+import cache
+import watermarks
+import change_log
+from sqlalchemy import func, desc, select, insert, update, delete, tuple_, text, Date, Integer
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import List, Optional
+from datetime import datetime, timedelta, date
+from itertools import product
+import base64
+import json
+
+# 인덱스를 탈 수 있도록 [시작일, 다음 기간 시작일) 반개구간으로 반환
+def get_month_bounds(year: int, month: int):
+    start_date = date(year, month, 1)
+    end_date = date(year + month // 12, month % 12 + 1, 1)
     return start_date, end_date
 
+def get_year_bounds(year: int):
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+#조회 컬럼 선택 (fields가 없으면 전체, 있으면 기본키 + 요청 컬럼)
+def select_columns(model, fields: Optional[List[str]] = None):
+    table_columns = model.__table__.columns
+    if not fields:
+        return list(table_columns)
+
+    unknown = [name for name in fields if name not in table_columns]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    pk = model.__mapper__.primary_key[0]
+    names = [pk.name] + [name for name in dict.fromkeys(fields) if name != pk.name]
+    return [table_columns[name] for name in names]
+
+def rows_to_dicts(rows):
+    return [row._asdict() for row in rows]
+
+#페이지네이션 (기본키 기준 keyset)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(last_id: int):
+    return base64.urlsafe_b64encode(json.dumps({"after": last_id}).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["after"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("invalid cursor") from e
+
+def get_page(db: Session, model, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None,
+             start_date: Optional[date] = None, end_date: Optional[date] = None, account_idx: Optional[int] = None, fields: Optional[List[str]] = None):
+    pk = model.__mapper__.primary_key[0]
+    querys = db.query(*select_columns(model, fields))
+
+    if after is not None:
+        querys = querys.filter(pk > after)
+    if start_date:
+        querys = querys.filter(model.date >= start_date)
+    if end_date:
+        querys = querys.filter(model.date <= end_date)
+    if account_idx is not None:
+        querys = querys.filter(model.account_idx == account_idx)
+
+    # limit보다 한 건 더 읽어서 다음 페이지 존재 여부 판단
+    rows = querys.order_by(pk).limit(limit + 1).all()
+    next_cursor = encode_cursor(getattr(rows[limit - 1], pk.key)) if len(rows) > limit else None
+    return {"items": rows_to_dicts(rows[:limit]), "next_cursor": next_cursor}
+
+#변경 피드: since 토큰 이후 추가/수정/삭제된 행을 변경 순서대로 반환
+#since가 없으면 현재 위치 토큰만 반환 (토큰을 받은 뒤 전체 목록을 한 번 내려받고 이후에는 변경분만 동기화)
+def get_changes(db: Session, since: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE, tables: Optional[List[str]] = None):
+    if since is None:
+        return {"changes": [], "next_token": encode_cursor(change_log.head(db)), "has_more": False}
+    feed = change_log.get_changes(db, since, limit, tables)
+    return {"changes": feed["changes"], "next_token": encode_cursor(feed["last"]), "has_more": feed["has_more"]}
+
+#기간 버킷 집계: GROUP BY 한 번으로 모든 지표를 계산하고, 데이터가 없는 기간은 0으로 채워서 반환
+#by에는 시간 버킷(year, month, week, day) 하나와 분류 버킷(shift, line 등 컬럼명)을 함께 쓸 수 있음
+#기간은 [start_date, end_date) 반개구간
+TIME_BUCKETS = {"year": ("year",), "month": ("year", "month"), "week": ("week",), "day": ("date",)}
+
+def bucket_columns(bucket: str, column, dialect_name: str):
+    if bucket == "year":
+        return [func.extract("year", column).label("year")]
+    if bucket == "month":
+        return [func.extract("year", column).label("year"), func.extract("month", column).label("month")]
+    if bucket == "week":
+        # 주 시작일(월요일)
+        if dialect_name == "sqlite":
+            offset = (func.strftime("%w", column).cast(Integer) + 6) % 7
+            return [func.date(column, func.printf("-%d days", offset), type_=Date).label("week")]
+        return [func.subdate(column, func.weekday(column), type_=Date).label("week")]
+    if bucket == "day":
+        return [column.label("date")]
+    raise ValueError(f"unknown bucket '{bucket}'")
+
+def time_bucket_keys(bucket: str, start_date: date, end_date: date):
+    if bucket == "year":
+        return [(year,) for year in range(start_date.year, (end_date - timedelta(days=1)).year + 1)]
+    if bucket == "month":
+        keys = []
+        year, month = start_date.year, start_date.month
+        while date(year, month, 1) < end_date:
+            keys.append((year, month))
+            year, month = year + month // 12, month % 12 + 1
+        return keys
+    if bucket == "week":
+        current = start_date - timedelta(days=start_date.weekday())
+        step = timedelta(days=7)
+    else:
+        current = start_date
+        step = timedelta(days=1)
+    keys = []
+    while current < end_date:
+        keys.append((current,))
+        current += step
+    return keys
+
+#MySQL은 AVG/SUM 결과를 Decimal로 돌려주므로 (ORJSONResponse가 Decimal을 직렬화하지 못함) 평균은 float, 합계/건수는 int로 변환
+def metric_value(expr, value):
+    if value is None:
+        return None
+    if expr.name == "avg" or not isinstance(expr.type, Integer):
+        return float(value)
+    return int(value)
+
+def aggregate(db: Session, model, metrics: dict, by: List[str], start_date: date, end_date: date, conditions: list = None, date_column=None):
+    date_column = date_column if date_column is not None else model.date
+    dialect_name = db.get_bind().dialect.name
+    time_buckets = [name for name in by if name in TIME_BUCKETS]
+    if len(time_buckets) > 1:
+        raise ValueError("only one time bucket is allowed")
+
+    group_columns = []
+    for name in by:
+        if name in TIME_BUCKETS:
+            group_columns.extend(bucket_columns(name, date_column, dialect_name))
+        elif name in model.__table__.columns:
+            group_columns.append(model.__table__.columns[name])
+        else:
+            raise ValueError(f"unknown bucket '{name}'")
+    key_names = [column.name for column in group_columns]
+
+    stmt = select(*group_columns, *[expr.label(name) for name, expr in metrics.items()])\
+        .where(date_column >= start_date, date_column < end_date, *(conditions or []))\
+        .group_by(*group_columns)
+    rows = {}
+    for row in db.execute(stmt):
+        values = row._asdict()
+        values.update((name, metric_value(expr, values[name])) for name, expr in metrics.items())
+        rows[tuple(row[:len(key_names)])] = values
+
+    # 빈 기간 채우기: 시간 버킷은 기간 전체, 분류 버킷은 조회된 값 기준
+    domains = []
+    for name in by:
+        if name in TIME_BUCKETS:
+            domains.append(time_bucket_keys(name, start_date, end_date))
+        else:
+            position = key_names.index(name)
+            domains.append([(value,) for value in sorted({key[position] for key in rows}, key=lambda v: (v is None, v))])
+
+    result = []
+    empty = dict.fromkeys(metrics, 0)
+    for parts in product(*domains):
+        key = tuple(value for part in parts for value in part)
+        result.append(rows.get(key) or {**dict(zip(key_names, key)), **empty})
+    return result
+
+#월 순번 (연속한 달이면 1 차이)
+def month_key(year: int, month: int):
+    return year * 12 + month - 1
+
+def previous_month_of(year: int, month: int):
+    return (year - 1, 12) if month == 1 else (year, month - 1)
+
+#월별 금액(year, month, group, amount)에 LAG()로 전월 금액을 붙여서 증감률 계산
+#전월 행이 없는 경우(LAG가 더 이전 달을 가리키는 경우)는 전월 금액 0
+def growth_series(db: Session, amounts, group: str, start_year: int, start_month: int):
+    window = dict(partition_by=amounts.c[group], order_by=(amounts.c.year, amounts.c.month))
+    stmt = select(
+        amounts.c.year, amounts.c.month, amounts.c[group], amounts.c.amount,
+        func.lag(amounts.c.amount).over(**window).label("previous_amount"),
+        func.lag(amounts.c.year).over(**window).label("previous_year"),
+        func.lag(amounts.c.month).over(**window).label("previous_month"),
+    ).order_by(amounts.c.year, amounts.c.month, amounts.c[group])
+
+    results = []
+    for row in db.execute(stmt):
+        year, month = int(row.year), int(row.month)
+        if month_key(year, month) < month_key(start_year, start_month) or row.amount is None:
+            continue
+        consecutive = row.previous_year is not None and month_key(int(row.previous_year), int(row.previous_month)) == month_key(year, month) - 1
+        previous_amount = row.previous_amount if consecutive and row.previous_amount is not None else 0.0
+        growth_rate = ((row.amount - previous_amount) / previous_amount * 100) if previous_amount else 0.0
+        results.append({
+            "year": year,
+            "month": month,
+            group: row._mapping[group],
+            "previous_amount": previous_amount,
+            "current_amount": row.amount,
+            "growth_rate": growth_rate,
+        })
+    return results
+
+#원본 행이 바뀌면 같은 트랜잭션에서 다시 계산하는 파생 테이블 (생산계획 요약, 품목 단가)
+#응답 캐시도 같은 키 흐름으로 바뀐 (테이블, 연도, 월)을 받아서 commit 후에 무효화, 변경 카운터(ETag)는 같은 트랜잭션에서 증가
+#lock이 있는 파생 테이블은 원본 행을 쓰기 전에 영향을 받는 파생 행을 잠가서 같은 키를 쓰는 트랜잭션을 순서대로 처리
+DERIVED_TABLES = (summaries, item_prices, cache, watermarks)
+
+def derived_keys_for_rows(model, rows: List[dict]):
+    return {table: table.keys_for_rows(model, rows) for table in DERIVED_TABLES if model in table.SOURCES}
+
+def derived_keys_for_query(db: Session, model, conditions: list, lock: bool = False):
+    return {table: table.keys_for_query(db, model, conditions, lock) for table in DERIVED_TABLES if model in table.SOURCES}
+
+#원본 쓰기 전에 호출 (changes가 있으면 수정 후 키도 포함)
+def lock_derived(db: Session, model, keys: dict, changes: dict = None):
+    if changes is not None:
+        keys = {table: table_keys | table.keys_after_update(model, table_keys, changes) for table, table_keys in keys.items()}
+    for table, table_keys in keys.items():
+        lock = getattr(table, "lock", None)
+        if lock:
+            lock(db, table_keys)
+    return keys
+
+#기존 행 수정/삭제 전에 호출: 파생 행을 먼저 잠근 뒤(잠금 순서는 항상 파생 행 → 원본 행) 원본 행을 FOR UPDATE로 다시 읽어서
+#잠금을 기다리는 동안 다른 트랜잭션이 commit한 값 기준으로 키(생산 수량 차이)를 계산, 다시 읽은 키가 다르면 추가로 잠금
+def lock_derived_for_query(db: Session, model, conditions: list, changes: dict = None):
+    lock_derived(db, model, derived_keys_for_query(db, model, conditions), changes)
+    return lock_derived(db, model, derived_keys_for_query(db, model, conditions, lock=True), changes)
+
+#원본 쓰기 후 commit 전에 호출
+def refresh_derived(db: Session, keys: dict):
+    for table, table_keys in keys.items():
+        table.refresh(db, table_keys)
+
+def row_values(obj):
+    return {column.name: getattr(obj, column.name) for column in obj.__table__.columns}
+
+#ORM 단건 추가/삭제: flush 전에 파생 행을 잠그고 commit 전에 파생 테이블 갱신과 변경 기록
+#삭제는 지우기 전 행 기준 키(keys_for_query), 추가는 새 행 기준 키(keys_for_rows)
+def after_row_write(db: Session, model, obj, operation: str):
+    pk = model.__mapper__.primary_key[0]
+    if operation == "delete":
+        keys = lock_derived_for_query(db, model, [pk == getattr(obj, pk.name)])
+    else:
+        keys = lock_derived(db, model, derived_keys_for_rows(model, [row_values(obj)]))
+    db.flush()
+    refresh_derived(db, keys)
+    change_log.record(db, model, [getattr(obj, pk.name)], operation)
+
+def primary_keys(db: Session, model, conditions: list):
+    pk = model.__mapper__.primary_key[0]
+    return db.execute(select(pk).where(*conditions)).scalars().all()
+
+#대량 insert: chunk마다 multi-row INSERT 한 번, 전체를 하나의 트랜잭션으로 처리하고 생성된 id 반환
+BULK_CHUNK_SIZE = 1000
+
+#commit 없이 insert (여러 번 나눠 넣는 쪽에서 전체를 하나의 트랜잭션으로 묶을 때 사용)
+def insert_rows(db: Session, model, rows: List[dict]):
+    pk = model.__mapper__.primary_key[0]
+    dialect = db.get_bind().dialect
+    ids = []
+
+    derived_keys = lock_derived(db, model, derived_keys_for_rows(model, rows))
+    # MySQL: multi-row INSERT는 auto_increment_increment 간격의 연속된 값을 받으므로 첫 id부터 계산
+    # (Group Replication/Galera 다중 primary는 간격이 1이 아님)
+    step = 1 if dialect.insert_returning else db.execute(text("SELECT @@auto_increment_increment")).scalar()
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_CHUNK_SIZE]
+        if dialect.insert_returning:
+            result = db.execute(insert(model.__table__).returning(pk, sort_by_parameter_order=True), chunk)
+            ids.extend(result.scalars().all())
+        else:
+            result = db.execute(insert(model.__table__).values(chunk))
+            ids.extend(range(result.lastrowid, result.lastrowid + len(chunk) * step, step))
+    refresh_derived(db, derived_keys)
+    change_log.record(db, model, ids, "insert")
+    return ids
+
+def bulk_insert(db: Session, model, rows: List[dict]):
+    try:
+        ids = insert_rows(db, model, rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return ids
+
+#대량 upsert: 같은 키의 행이 있으면 새 값으로 덮어써서 재실행해도 행이 늘지 않음
+UPSERT_KEYS = ("date", "item_number", "account_idx")
+
+def upsert_statement(dialect_name: str, table, chunk: List[dict], keys):
+    columns = [column.name for column in table.columns if column.name not in keys and not column.primary_key and column.name != "version"]
+    if dialect_name == "mysql":
+        stmt = mysql_insert(table).values(chunk)
+        changes = {name: stmt.inserted[name] for name in columns}
+        return stmt.on_duplicate_key_update(**changes, version=table.c.version + 1)
+    if dialect_name == "sqlite":
+        stmt = sqlite_insert(table).values(chunk)
+        changes = {name: stmt.excluded[name] for name in columns}
+        return stmt.on_conflict_do_update(index_elements=list(keys), set_={**changes, "version": table.c.version + 1})
+    raise ValueError(f"upsert not supported for '{dialect_name}'")
+
+#새로 들어간 행과 덮어쓴 행을 구분하지 않고 변경(update)으로 기록
+def bulk_upsert(db: Session, model, rows: List[dict], keys=UPSERT_KEYS):
+    dialect_name = db.get_bind().dialect.name
+    key_columns = tuple_(*[model.__table__.c[key] for key in keys])
+    try:
+        derived_keys = lock_derived(db, model, derived_keys_for_rows(model, rows))
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            chunk = rows[start:start + BULK_CHUNK_SIZE]
+            db.execute(upsert_statement(dialect_name, model.__table__, chunk, keys))
+            ids = primary_keys(db, model, [key_columns.in_([tuple(row.get(key) for key in keys) for row in chunk])])
+            change_log.record(db, model, ids, "update")
+        refresh_derived(db, derived_keys)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+#단건 수정: 보낸 필드만 UPDATE 한 번으로 반영, version을 보내면 다른 단말기의 수정과 충돌 검사
+class VersionConflict(Exception):
+    pass
+
+def update_row(db: Session, model, row_id: int, changes: BaseModel):
+    table = model.__table__
+    pk = model.__mapper__.primary_key[0]
+    values = changes.model_dump(exclude_unset=True)
+    expected_version = values.pop("version", None)
+
+    stmt = update(table).where(pk == row_id).values(**values, version=table.c.version + 1)
+    if expected_version is not None:
+        stmt = stmt.where(table.c.version == expected_version)
+
+    try:
+        derived_keys = lock_derived_for_query(db, model, [pk == row_id], values)
+        if db.get_bind().dialect.update_returning:
+            row = db.execute(stmt.returning(*table.columns)).first()
+        else:
+            # MySQL은 RETURNING이 없으므로 같은 트랜잭션에서 다시 조회
+            result = db.execute(stmt)
+            row = db.execute(select(*table.columns).where(pk == row_id)).first() if result.rowcount else None
+        exists = row is not None or db.execute(select(pk).where(pk == row_id)).first() is not None
+        if row is not None:
+            refresh_derived(db, derived_keys)
+            change_log.record(db, model, [row_id], "update")
+    except Exception:
+        db.rollback()
+        raise
+
+    if row is None:
+        db.rollback()
+        if exists:
+            raise VersionConflict(f"{table.name} {row_id} was modified by another request")
+        return None
+    db.commit()
+    return row._asdict()
+
+#조건 일괄 수정/삭제: 조건에 맞는 행을 UPDATE/DELETE 한 번으로 처리 (dry_run이면 대상 건수만 반환)
+#조건 없이 테이블 전체가 바뀌는 것을 막기 위해 조건은 하나 이상 필요
+def count_rows(db: Session, model, conditions: list):
+    return db.execute(select(func.count()).select_from(model.__table__).where(*conditions)).scalar()
+
+def bulk_update_rows(db: Session, model, conditions: list, changes: BaseModel, dry_run: bool = False):
+    if not conditions:
+        raise ValueError("at least one filter is required")
+    table = model.__table__
+    values = changes.model_dump(exclude_unset=True)
+    values.pop("version", None)
+    if not values:
+        raise ValueError("no fields to update")
+    if dry_run:
+        return count_rows(db, model, conditions)
+
+    try:
+        derived_keys = lock_derived_for_query(db, model, conditions, values)
+        ids = primary_keys(db, model, conditions)
+        result = db.execute(update(table).where(*conditions).values(**values, version=table.c.version + 1))
+        refresh_derived(db, derived_keys)
+        change_log.record(db, model, ids, "update")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result.rowcount
+
+def bulk_delete_rows(db: Session, model, conditions: list, dry_run: bool = False):
+    if not conditions:
+        raise ValueError("at least one filter is required")
+    if dry_run:
+        return count_rows(db, model, conditions)
+
+    try:
+        derived_keys = lock_derived_for_query(db, model, conditions)
+        ids = primary_keys(db, model, conditions)
+        result = db.execute(delete(model.__table__).where(*conditions))
+        refresh_derived(db, derived_keys)
+        change_log.record(db, model, ids, "delete")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return result.rowcount
+
 #plan CRUD
 #plan Create
 def create_plan(db: Session, plan: schemas.PlanCreate):
@@ -28,14 +427,14 @@ def create_plan(db: Session, plan: schemas.PlanCreate):
         account_idx = plan.account_idx
     )
     db.add(db_plan)
+    after_row_write(db, Plan, db_plan, "insert")
     db.commit()
     db.refresh(db_plan)
     return db_plan.__dict__
 
 #plan전체
-def get_all_plans(db: Session):
-    plan_get=db.query(Plan).all()
-    return [plan.__dict__ for plan in plan_get]
+def get_all_plans(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None, account_idx: Optional[int] = None, fields: Optional[List[str]] = None):
+    return get_page(db, Plan, limit, after, account_idx=account_idx, fields=fields)
 
 #연도별 plan rate 데이터
 def get_plans_rate_for_year(db: Session, year: int) -> List[schemas.PlanResponse]:
@@ -73,17 +472,18 @@ def get_plans_rate_for_year(db: Session, year: int) -> List[schemas.PlanResponse
 
 #월별 plan 상승률
 def get_plan_rate_for_month(db: Session, year: int, month: int):
-    previous_month = (month - 1) or 12
-    current_data = db.query(func.sum(Plan.inventory*InventoryManagement.price).label("current_amount"), Plan.process)\
-        .select_from(InventoryManagement)\
-        .join(Plan, Plan.item_name == InventoryManagement.item_name)\
-        .filter(Plan.year == year, Plan.month == month)\
-        .group_by(Plan.process).all()
-    previous_data = db.query(func.sum(Plan.inventory*InventoryManagement.price).label("previous_amount"), Plan.process)\
-        .select_from(InventoryManagement)\
-        .join(Plan, Plan.item_name == InventoryManagement.item_name)\
-        .filter(Plan.year == year, Plan.month == previous_month)\
-        .group_by(Plan.process).all()
+    previous_year, previous_month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+    # 품목별 단가 한 건과 조인 (해당 월 기준 최신 단가)
+    def plan_amounts(target_year: int, target_month: int, label: str):
+        prices = item_prices.latest_prices("inventory", date(target_year, target_month, 1))
+        return db.query(func.sum(Plan.inventory * prices.c.price).label(label), Plan.process)\
+            .join(prices, prices.c.item_name == Plan.item_name)\
+            .filter(Plan.year == target_year, Plan.month == target_month)\
+            .group_by(Plan.process).all()
+
+    current_data = plan_amounts(year, month, "current_amount")
+    previous_data = plan_amounts(previous_year, previous_month, "previous_amount")
     previous_map = {data.process: data.previous_amount for data in previous_data}
     results = []
 
@@ -102,19 +502,25 @@ def get_plan_rate_for_month(db: Session, year: int, month: int):
         results.append(result)
     return results
 
+#기간별 plan 상승률 (공정별, 월마다 그 달 기준 최신 단가 사용)
+def get_plan_rate_series(db: Session, start_year: int, start_month: int, end_year: int, end_month: int):
+    first_year, first_month = previous_month_of(start_year, start_month)
+    plan_key = Plan.year * 12 + Plan.month - 1
+    price = select(ItemPrice.price)\
+        .where(
+            ItemPrice.source == "inventory",
+            ItemPrice.item_name == Plan.item_name,
+            func.extract("year", ItemPrice.period) * 12 + func.extract("month", ItemPrice.period) - 1 <= plan_key,
+        )\
+        .order_by(desc(ItemPrice.period)).limit(1).correlate(Plan).scalar_subquery()
+    amounts = select(Plan.year, Plan.month, Plan.process, func.sum(Plan.inventory * price).label("amount"))\
+        .where(Plan.year.between(first_year, end_year), plan_key.between(month_key(first_year, first_month), month_key(end_year, end_month)))\
+        .group_by(Plan.year, Plan.month, Plan.process).subquery()
+    return growth_series(db, amounts, "process", start_year, start_month)
+
 #plan Update
 def update_plan(db: Session, plan_id: int, plan_update: schemas.PlanUpdate):
-    plan = db.query(Plan).filter(Plan.plan_idx == plan_id).first()
-    
-    if not plan:
-        return None  
-    
-    for var, value in vars(plan_update).items():
-        setattr(plan, var, value)  
-        
-    db.commit()
-    db.refresh(plan)  
-    return plan
+    return update_row(db, Plan, plan_id, plan_update)
 
 #plan Delete
 def delete_plan(db: Session, plan_id: int):
@@ -124,6 +530,7 @@ def delete_plan(db: Session, plan_id: int):
         return None
     
     db.delete(plan)
+    after_row_write(db, Plan, plan, "delete")
     db.commit()
     return plan
 
@@ -149,75 +556,82 @@ def create_production(db: Session, production: schemas.ProductionCreate):
         account_idx=production.account_idx
     )
     db.add(db_production)
+    after_row_write(db, Production, db_production, "insert")
     db.commit()
     db.refresh(db_production)
     return db_production.__dict__
 
-def get_production(db: Session, production_id: int):
-    production_get = db.query(Production).filter(Production.production_idx == production_id).first()
-    return  production_get
+def create_productions_bulk(db: Session, productions: List[schemas.ProductionCreate]):
+    return bulk_insert(db, Production, [production.model_dump() for production in productions])
 
-def get_production_year(db: Session, year: int):
-    production_get = db.query(Production).filter(extract('year', Production.date) == year).all()
-    return  [production.__dict__ for production in production_get]
+def get_production(db: Session, production_id: int, fields: Optional[List[str]] = None):
+    production_get = db.query(*select_columns(Production, fields)).filter(Production.production_idx == production_id).first()
+    return  production_get._asdict() if production_get else None
 
-def get_production_efficiency_for_year(db: Session, year: int) -> List[schemas.ProductionResponse]:
-    plans_for_year = []
+def get_production_year(db: Session, year: int, fields: Optional[List[str]] = None):
+    start_date, end_date = get_year_bounds(year)
+    production_get = db.query(*select_columns(Production, fields)).filter(Production.date >= start_date, Production.date < end_date).all()
+    return  rows_to_dicts(production_get)
 
-    for month in range(1, 13):
-        start_date, end_date = get_month_range(year, month)
-        production_efficiency = db.query(func.avg(Production.production_efficiency))\
-            .filter(Production.date.between(start_date.date(), end_date.date()))\
-            .scalar() or 0
-        line_efficiency = db.query(func.avg(Production.line_efficiency))\
-            .filter(Production.date.between(start_date.date(), end_date.date()))\
-            .scalar() or 0
-        
-        monthly_plan = schemas.ProductionResponse(
-            year=year,
-            month=month,
-            production_efficiency=int(production_efficiency),
-            line_efficiency=int(line_efficiency)
+PRODUCTION_METRICS = {
+    "production_efficiency": func.avg(Production.production_efficiency),
+    "line_efficiency": func.avg(Production.line_efficiency),
+    "target_quantity": func.sum(Production.target_quantity),
+    "produced_quantity": func.sum(Production.produced_quantity),
+    "count": func.count(Production.production_idx),
+}
+
+def get_production_efficiency_for_year(db: Session, year: int) -> List[schemas.ProductionResponse]:
+    start_date, end_date = get_year_bounds(year)
+    metrics = {name: PRODUCTION_METRICS[name] for name in ("production_efficiency", "line_efficiency")}
+    rows = aggregate(db, Production, metrics, ["month"], start_date, end_date)
+    return [
+        schemas.ProductionResponse(
+            year=row["year"],
+            month=row["month"],
+            production_efficiency=int(row["production_efficiency"] or 0),
+            line_efficiency=int(row["line_efficiency"] or 0)
         )
-        plans_for_year.append(monthly_plan)
-    return plans_for_year
+        for row in rows
+    ]
+
+#production 기간별 집계 (by=month,line 등, 여러 해도 가능)
+def get_production_rollup(db: Session, by: List[str], start_date: date, end_date: date):
+    return aggregate(db, Production, PRODUCTION_METRICS, by, start_date, end_date)
 
 #production전체
-def get_all_productions(db: Session):
-    production_get = db.query(Production).all()
-    return [production.__dict__ for production in production_get]
+def get_all_productions(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None, start_date: Optional[date] = None, end_date: Optional[date] = None, account_idx: Optional[int] = None, fields: Optional[List[str]] = None):
+    return get_page(db, Production, limit, after, start_date, end_date, account_idx, fields)
 
-def get_days_production(db: Session, start_date: datetime.date, end_date: datetime.date, operator: str , item_number: str , item_name: str):
-    querys = db.query(Production).filter(Production.date.between(start_date, end_date))
-    
+#production 조회 조건 (기간 조회와 export가 같이 사용)
+def production_filters(start_date: Optional[date] = None, end_date: Optional[date] = None, operator: str = None, item_number: str = None, item_name: str = None):
+    conditions = []
+
+    if start_date:
+        conditions.append(Production.date >= start_date)
+    if end_date:
+        conditions.append(Production.date <= end_date)
     if operator:
-        querys = querys.filter(Production.operator == operator)
+        conditions.append(Production.operator == operator)
     if item_number:
-        querys = querys.filter(Production.item_number == item_number)
+        conditions.append(Production.item_number == item_number)
     if item_name:
-        querys = querys.filter(Production.item_name == item_name)
-    
+        conditions.append(Production.item_name == item_name)
+    return conditions
+
+def get_days_production(db: Session, start_date: datetime.date, end_date: datetime.date, operator: str , item_number: str , item_name: str, fields: Optional[List[str]] = None):
+    querys = db.query(*select_columns(Production, fields)).filter(*production_filters(start_date, end_date, operator, item_number, item_name))
     production_get = querys.order_by(desc(Production.production_idx)).all()
-    return [production.__dict__ for production in production_get]
+    return rows_to_dicts(production_get)
 
 #특정날짜 production반환
-def get_day_production(db: Session, date: datetime.date):
-    production_get = db.query(Production).filter(Production.date == date).order_by(desc(Production.production_idx)).all()
-    return [production.__dict__ for production in production_get]
+def get_day_production(db: Session, date: datetime.date, fields: Optional[List[str]] = None):
+    production_get = db.query(*select_columns(Production, fields)).filter(Production.date == date).order_by(desc(Production.production_idx)).all()
+    return rows_to_dicts(production_get)
 
 #production Upadate
 def update_production(db: Session, production_id: int, production_update: schemas.ProductionUpdate):
-    production = db.query(Production).filter(Production.production_idx == production_id).first()
-    
-    if not production:
-        return None  
-    
-    for var, value in vars(production_update).items():
-        setattr(production, var, value)  
-        
-    db.commit()
-    db.refresh(production)  
-    return production
+    return update_row(db, Production, production_id, production_update)
 
 #production Delete
 def delete_production(db: Session, production_id: int):
@@ -227,9 +641,17 @@ def delete_production(db: Session, production_id: int):
         return None
     
     db.delete(production)
+    after_row_write(db, Production, production, "delete")
     db.commit()
     return production
 
+#production 조건 일괄 수정/삭제
+def bulk_update_productions(db: Session, filters: dict, changes: schemas.ProductionUpdate, dry_run: bool = False):
+    return bulk_update_rows(db, Production, production_filters(**filters), changes, dry_run)
+
+def bulk_delete_productions(db: Session, filters: dict, dry_run: bool = False):
+    return bulk_delete_rows(db, Production, production_filters(**filters), dry_run)
+
 #inventory_management CRUD
 #inventory_management Create
 def create_inventory_management(db: Session, inventory: schemas.InventoryManagementCreate):
@@ -254,36 +676,48 @@ def create_inventory_management(db: Session, inventory: schemas.InventoryManagem
         account_idx=inventory.account_idx
     )
     db.add(db_inventory)
+    after_row_write(db, InventoryManagement, db_inventory, "insert")
     db.commit()
     db.refresh(db_inventory)
     return db_inventory.__dict__
 
-def get_inventory(db: Session, inventory_id: int):
-    inventory_get = db.query(InventoryManagement).filter(InventoryManagement.inventory_idx == inventory_id).first()
-    return  inventory_get
+def create_inventories_bulk(db: Session, inventories: List[schemas.InventoryManagementCreate]):
+    return bulk_insert(db, InventoryManagement, [inventory.model_dump() for inventory in inventories])
+
+#(date, item_number, account_idx) 기준 일별 재고 스냅샷 upsert
+def upsert_inventories(db: Session, inventories: List[schemas.InventoryManagementCreate]):
+    return bulk_upsert(db, InventoryManagement, [inventory.model_dump() for inventory in inventories])
+
+def get_inventory(db: Session, inventory_id: int, fields: Optional[List[str]] = None):
+    inventory_get = db.query(*select_columns(InventoryManagement, fields)).filter(InventoryManagement.inventory_idx == inventory_id).first()
+    return  inventory_get._asdict() if inventory_get else None
     
 #inventory전체
-def get_all_inventories(db: Session):
-    inventory_get = db.query(InventoryManagement).all()
-    return [inventory.__dict__ for inventory in inventory_get]
+def get_all_inventories(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None, start_date: Optional[date] = None, end_date: Optional[date] = None, account_idx: Optional[int] = None, fields: Optional[List[str]] = None):
+    return get_page(db, InventoryManagement, limit, after, start_date, end_date, account_idx, fields)
 
-def get_month_inventory(db: Session, year: int, month: int):
-    inventory_get = db.query(InventoryManagement).filter(extract('year', InventoryManagement.date) == year, extract('month', InventoryManagement.date) == month).order_by(desc(InventoryManagement.inventory_idx)).all()
-    return [inventory.__dict__ for inventory in inventory_get]
+def get_month_inventory(db: Session, year: int, month: int, fields: Optional[List[str]] = None):
+    start_date, end_date = get_month_bounds(year, month)
+    inventory_get = db.query(*select_columns(InventoryManagement, fields)).filter(InventoryManagement.date >= start_date, InventoryManagement.date < end_date).order_by(desc(InventoryManagement.inventory_idx)).all()
+    return rows_to_dicts(inventory_get)
+
+#inventory 조회 조건
+def inventory_filters(start_date: Optional[date] = None, end_date: Optional[date] = None, item_number: str = None, item_name: str = None):
+    conditions = []
+
+    if start_date:
+        conditions.append(InventoryManagement.date >= start_date)
+    if end_date:
+        conditions.append(InventoryManagement.date <= end_date)
+    if item_number:
+        conditions.append(InventoryManagement.item_number == item_number)
+    if item_name:
+        conditions.append(InventoryManagement.item_name == item_name)
+    return conditions
 
 #inventory_management Update
 def update_inventory(db: Session, inventory_id: int, inventory_update: schemas.InventoryManagementUpdate):
-    inventory = db.query(InventoryManagement).filter(InventoryManagement.inventory_idx == inventory_id).first()
-    
-    if not inventory:
-        return None  
-    
-    for var, value in vars(inventory_update).items():
-        setattr(inventory, var, value)  
-        
-    db.commit()
-    db.refresh(inventory)  
-    return inventory
+    return update_row(db, InventoryManagement, inventory_id, inventory_update)
 
 #inventory_management Delete
 def delete_inventory(db: Session, inventory_id: int):
@@ -293,9 +727,17 @@ def delete_inventory(db: Session, inventory_id: int):
         return None
     
     db.delete(inventory)
+    after_row_write(db, InventoryManagement, inventory, "delete")
     db.commit()
     return inventory
 
+#inventory_management 조건 일괄 수정/삭제
+def bulk_update_inventories(db: Session, filters: dict, changes: schemas.InventoryManagementUpdate, dry_run: bool = False):
+    return bulk_update_rows(db, InventoryManagement, inventory_filters(**filters), changes, dry_run)
+
+def bulk_delete_inventories(db: Session, filters: dict, dry_run: bool = False):
+    return bulk_delete_rows(db, InventoryManagement, inventory_filters(**filters), dry_run)
+
 #material CRUD
 #material Create
 def create_materials(db: Session, material: schemas.MaterialCreate):
@@ -311,28 +753,21 @@ def create_materials(db: Session, material: schemas.MaterialCreate):
         account_idx=material.account_idx
     )
     db.add(db_material)
+    after_row_write(db, Material, db_material, "insert")
     db.commit()
     db.refresh(db_material)
     return db_material.__dict__
 
+def create_materials_bulk(db: Session, materials: List[schemas.MaterialCreate]):
+    return bulk_insert(db, Material, [material.model_dump() for material in materials])
+
 #material 전체
-def get_all_materials(db: Session):
-    material_get = db.query(Material).all()
-    return [material.__dict__ for material in material_get]
+def get_all_materials(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None, start_date: Optional[date] = None, end_date: Optional[date] = None, account_idx: Optional[int] = None, fields: Optional[List[str]] = None):
+    return get_page(db, Material, limit, after, start_date, end_date, account_idx, fields)
 
 #material Update
 def update_material(db: Session, material_id: int, material_update: schemas.MaterialUpdate):
-    material = db.query(Material).filter(Material.material_idx == material_id).first()
-    
-    if not material:
-        return None  
-    
-    for var, value in vars(material_update).items():
-        setattr(material, var, value)  
-        
-    db.commit()
-    db.refresh(material)  
-    return material
+    return update_row(db, Material, material_id, material_update)
 
 #material Delete
 def delete_material(db: Session, material_id: int):
@@ -342,6 +777,7 @@ def delete_material(db: Session, material_id: int):
         return None
     
     db.delete(material)
+    after_row_write(db, Material, material, "delete")
     db.commit()
     return material
 
@@ -360,25 +796,44 @@ def get_material_rate_for_year(db: Session, year: int) -> List[schemas.MaterialR
         
     return materials_for_year
 
+#material 조회 조건
+def material_filters(start_date: Optional[date] = None, end_date: Optional[date] = None, client: str = None, item_number: str = None, item_name: str = None):
+    conditions = []
+
+    if start_date:
+        conditions.append(Material.date >= start_date)
+    if end_date:
+        conditions.append(Material.date <= end_date)
+    if client:
+        conditions.append(Material.client == client)
+    if item_number:
+        conditions.append(Material.item_number == item_number)
+    if item_name:
+        conditions.append(Material.item_name == item_name)
+    return conditions
+
+#material 조건 일괄 수정/삭제
+def bulk_update_materials(db: Session, filters: dict, changes: schemas.MaterialUpdate, dry_run: bool = False):
+    return bulk_update_rows(db, Material, material_filters(**filters), changes, dry_run)
+
+def bulk_delete_materials(db: Session, filters: dict, dry_run: bool = False):
+    return bulk_delete_rows(db, Material, material_filters(**filters), dry_run)
+
 #월별 material 상승률
 def get_material_rate_for_month(db: Session, year: int, month: int):
-    current_start_date = datetime(year, month, 1)
-    next_month = month % 12 + 1
-    current_end_date = datetime(year, next_month, 1) - timedelta(days=1)
-    previous_month = (month - 1) or 12
-    previous_year = year - 1 if month == 1 else year
-    previous_start_date = datetime(previous_year, previous_month, 1)
-    previous_end_date = datetime(year, month, 1) - timedelta(days=1)
-    current_data = db.query(func.sum(Material.quantity*MaterialInvenManagement.price).label("current_amount"), Material.client)\
-        .select_from(MaterialInvenManagement)\
-        .join(Material, Material.item_name == MaterialInvenManagement.item_name)\
-        .filter(Material.date >= current_start_date, Material.date <= current_end_date)\
-        .group_by(Material.client).all()
-    previous_data = db.query(func.sum(Material.quantity*MaterialInvenManagement.price).label("previous_amount"), Material.client)\
-        .select_from(MaterialInvenManagement)\
-        .join(Material, Material.item_name == MaterialInvenManagement.item_name)\
-        .filter(Material.date >= previous_start_date, Material.date <= previous_end_date)\
-        .group_by(Material.client).all()
+    previous_year, previous_month = (year - 1, 12) if month == 1 else (year, month - 1)
+
+    # 품목별 단가 한 건과 조인 (해당 월 기준 최신 단가)
+    def material_amounts(target_year: int, target_month: int, label: str):
+        start_date, end_date = get_month_bounds(target_year, target_month)
+        prices = item_prices.latest_prices("material", start_date)
+        return db.query(func.sum(Material.quantity * prices.c.price).label(label), Material.client)\
+            .join(prices, prices.c.item_name == Material.item_name)\
+            .filter(Material.date >= start_date, Material.date < end_date)\
+            .group_by(Material.client).all()
+
+    current_data = material_amounts(year, month, "current_amount")
+    previous_data = material_amounts(previous_year, previous_month, "previous_amount")
     previous_map = {data.client: data.previous_amount for data in previous_data}
     results = []
 
@@ -397,10 +852,23 @@ def get_material_rate_for_month(db: Session, year: int, month: int):
         results.append(result)
     return results
 
+#기간별 material 상승률 (거래처별, 월마다 그 달 기준 최신 단가 사용)
+def get_material_rate_series(db: Session, start_year: int, start_month: int, end_year: int, end_month: int):
+    first_year, first_month = previous_month_of(start_year, start_month)
+    start_date, _ = get_month_bounds(first_year, first_month)
+    _, end_date = get_month_bounds(end_year, end_month)
+    year, month = func.extract("year", Material.date), func.extract("month", Material.date)
+    price = select(ItemPrice.price)\
+        .where(ItemPrice.source == "material", ItemPrice.item_name == Material.item_name, ItemPrice.period <= Material.date)\
+        .order_by(desc(ItemPrice.period)).limit(1).correlate(Material).scalar_subquery()
+    amounts = select(year.label("year"), month.label("month"), Material.client, func.sum(Material.quantity * price).label("amount"))\
+        .where(Material.date >= start_date, Material.date < end_date)\
+        .group_by(year, month, Material.client).subquery()
+    return growth_series(db, amounts, "client", start_year, start_month)
+
 #material_lot 전체
-def get_all_material_LOT(db: Session):
-    material_get = db.query(MaterialInven).all()
-    return [material.__dict__ for material in material_get]
+def get_all_material_LOT(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None, start_date: Optional[date] = None, end_date: Optional[date] = None, account_idx: Optional[int] = None, fields: Optional[List[str]] = None):
+    return get_page(db, MaterialInven, limit, after, start_date, end_date, account_idx, fields)
 
 #material_in_out_management CRUD
 #material_in_out_management Create
@@ -419,28 +887,21 @@ def create_in_out(db: Session, material: schemas.MaterialInOutManagementCreate):
         account_idx=material.account_idx
     )
     db.add(db_material)
+    after_row_write(db, MaterialInOutManagement, db_material, "insert")
     db.commit()
     db.refresh(db_material)
     return db_material.__dict__
 
+def create_in_out_bulk(db: Session, materials: List[schemas.MaterialInOutManagementCreate]):
+    return bulk_insert(db, MaterialInOutManagement, [material.model_dump() for material in materials])
+
 #material_in_out 전체
-def get_all_materials_in_out(db: Session):
-    material_get = db.query(MaterialInOutManagement).all()
-    return [material.__dict__ for material in material_get]
+def get_all_materials_in_out(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None, start_date: Optional[date] = None, end_date: Optional[date] = None, account_idx: Optional[int] = None, fields: Optional[List[str]] = None):
+    return get_page(db, MaterialInOutManagement, limit, after, start_date, end_date, account_idx, fields)
 
 #material_in_out_management Update
 def update_material_in_out(db: Session, material_id: int, material_update: schemas.MaterialInOutManagementUpdate):
-    material = db.query(MaterialInOutManagement).filter(MaterialInOutManagement.materialinout_idx == material_id).first()
-    
-    if not material:
-        return None  
-    
-    for var, value in vars(material_update).items():
-        setattr(material, var, value)  
-        
-    db.commit()
-    db.refresh(material)  
-    return material
+    return update_row(db, MaterialInOutManagement, material_id, material_update)
 
 #material_in_out_management Delete
 def delete_material_in_out(db: Session, material_id: int):
@@ -450,6 +911,7 @@ def delete_material_in_out(db: Session, material_id: int):
         return None
     
     db.delete(material)
+    after_row_write(db, MaterialInOutManagement, material, "delete")
     db.commit()
     return material
 
@@ -476,36 +938,31 @@ def create_material_invens(db: Session, inventory: schemas.MaterialInvenManageme
         account_idx=inventory.account_idx
     )
     db.add(db_inventory)
+    after_row_write(db, MaterialInvenManagement, db_inventory, "insert")
     db.commit()
     db.refresh(db_inventory)
     return db_inventory.__dict__
 
-def get_material_invens(db: Session, material_invens_id: int):
-    material_invens_get = db.query(MaterialInvenManagement).filter(MaterialInvenManagement.materialinvenmanage_idx == material_invens_id).first()
-    return  material_invens_get
+#(date, item_number, account_idx) 기준 일별 자재 재고 스냅샷 upsert
+def upsert_material_invens(db: Session, inventories: List[schemas.MaterialInvenManagementCreate]):
+    return bulk_upsert(db, MaterialInvenManagement, [inventory.model_dump() for inventory in inventories])
+
+def get_material_invens(db: Session, material_invens_id: int, fields: Optional[List[str]] = None):
+    material_invens_get = db.query(*select_columns(MaterialInvenManagement, fields)).filter(MaterialInvenManagement.materialinvenmanage_idx == material_invens_id).first()
+    return  material_invens_get._asdict() if material_invens_get else None
     
 #material_inven_management전체
-def get_all_material_invens(db: Session):
-    material_invens_get = db.query(MaterialInvenManagement).all()
-    return [material_invens.__dict__ for material_invens in material_invens_get]
+def get_all_material_invens(db: Session, limit: int = DEFAULT_PAGE_SIZE, after: Optional[int] = None, start_date: Optional[date] = None, end_date: Optional[date] = None, account_idx: Optional[int] = None, fields: Optional[List[str]] = None):
+    return get_page(db, MaterialInvenManagement, limit, after, start_date, end_date, account_idx, fields)
 
-def get_month_material_invens(db: Session, year: int, month: int):
-    material_invens_get = db.query(MaterialInvenManagement).filter(extract('year', MaterialInvenManagement.date) == year, extract('month', MaterialInvenManagement.date) == month).order_by(desc(MaterialInvenManagement.materialinvenmanage_idx)).all()
-    return [material_invens.__dict__ for material_invens in material_invens_get]
+def get_month_material_invens(db: Session, year: int, month: int, fields: Optional[List[str]] = None):
+    start_date, end_date = get_month_bounds(year, month)
+    material_invens_get = db.query(*select_columns(MaterialInvenManagement, fields)).filter(MaterialInvenManagement.date >= start_date, MaterialInvenManagement.date < end_date).order_by(desc(MaterialInvenManagement.materialinvenmanage_idx)).all()
+    return rows_to_dicts(material_invens_get)
 
 #material_inven_management Update
 def update_material_invens(db: Session, inventory_id: int, inventory_update: schemas.MaterialInvenManagementUpdate):
-    inventory = db.query(MaterialInvenManagement).filter(MaterialInvenManagement.materialinvenmanage_idx == inventory_id).first()
-    
-    if not inventory:
-        return None  
-    
-    for var, value in vars(inventory_update).items():
-        setattr(inventory, var, value)  
-        
-    db.commit()
-    db.refresh(inventory)  
-    return inventory
+    return update_row(db, MaterialInvenManagement, inventory_id, inventory_update)
 
 #material_inven_management Delete
 def delete_material_invens(db: Session, inventory_id: int):
@@ -515,42 +972,148 @@ def delete_material_invens(db: Session, inventory_id: int):
         return None
     
     db.delete(inventory)
+    after_row_write(db, MaterialInvenManagement, inventory, "delete")
     db.commit()
     return inventory
 
-#  Production을 월별로 집계하여 딕셔너리로 반환
+#export용 전체 컬럼 조회문 (기본키 순서)
+def export_query(model, conditions: list):
+    pk = model.__mapper__.primary_key[0]
+    return select(*model.__table__.columns).where(*conditions).order_by(pk)
+
+def get_productions_export_query(start_date: Optional[date], end_date: Optional[date], operator: str, item_number: str, item_name: str):
+    return export_query(Production, production_filters(start_date, end_date, operator, item_number, item_name))
+
+def get_inventories_export_query(start_date: Optional[date], end_date: Optional[date], item_number: str, item_name: str):
+    return export_query(InventoryManagement, inventory_filters(start_date, end_date, item_number, item_name))
+
+#분석용 테이블 (컬럼 선택과 기간 조건을 SQL에서 처리)
+ANALYTICS_TABLES = {
+    "productions": Production,
+    "inventories": InventoryManagement,
+    "materials": Material,
+    "materials_in_out": MaterialInOutManagement,
+}
+
+def get_analytics_query(table: str, columns: Optional[List[str]], start_date: Optional[date], end_date: Optional[date]):
+    model = ANALYTICS_TABLES.get(table)
+    if model is None:
+        raise ValueError(f"unknown table '{table}'")
+
+    table_columns = model.__table__.columns
+    if columns:
+        unknown = [name for name in columns if name not in table_columns]
+        if unknown:
+            raise ValueError(f"unknown columns: {', '.join(unknown)}")
+        selected = [table_columns[name] for name in columns]
+    else:
+        selected = list(table_columns)
+
+    conditions = []
+    if start_date:
+        conditions.append(model.date >= start_date)
+    if end_date:
+        conditions.append(model.date <= end_date)
+    pk = model.__mapper__.primary_key[0]
+    return select(*selected).where(*conditions).order_by(pk)
+
+#월 순번 first~last의 "YYYY-MM"별 값 (값이 없는 달은 fill(이전 달 값))
+def monthly_history(values: dict, first: int, last: int, fill):
+    history = {}
+    previous = None
+    for key in range(first, last + 1):
+        previous = values[key] if key in values else fill(previous)
+        history[f"{key // 12}-{key % 12 + 1:02d}"] = previous
+    return history
+
+#  Production을 월별로 집계하여 딕셔너리로 반환 (빈 달은 0)
+#  전체 행을 읽지 않도록 DB에서 GROUP BY로 집계 (이벤트 루프에서 실행되므로 CPU 작업을 만들지 않음)
 def get_history_for_order_volume(db: Session):
-    data = db.query(Production).all()
-    if not data:
+    year, month = func.extract("year", Production.date), func.extract("month", Production.date)
+    rows = db.execute(
+        select(year, month, func.sum(Production.produced_quantity))
+        .where(Production.date.is_not(None))
+        .group_by(year, month)
+    )
+    totals = {month_key(int(key_year), int(key_month)): int(quantity or 0) for key_year, key_month, quantity in rows}
+    if not totals:
         return {}
-        
-    df = pd.DataFrame([{
-        'date': p.date,
-        'quantity': p.produced_quantity
-    } for p in data])
-    
-    df['date'] = pd.to_datetime(df['date'])
-    df_monthly = df.set_index('date').resample('M').sum().reset_index()
-    
-    return {row['date'].strftime('%Y-%m'): int(row['quantity']) for _, row in df_monthly.iterrows()}
+    return monthly_history(totals, min(totals), max(totals), lambda previous: 0)
 
 # InventoryManagement를 월별로 집계하여 딕셔너리로 반환
+# 달마다 가장 늦은 날짜 행의 현재 수량, 행이 없는 달은 이전 달 값 (처음부터 없으면 0)
 def get_history_for_safety_stock(db: Session):
-    data = db.query(InventoryManagement).all()
-    if not data:
+    first, last = db.execute(select(func.min(InventoryManagement.date), func.max(InventoryManagement.date))).one()
+    if first is None:
         return {}
-        
-    df = pd.DataFrame([{
-        'date': inv.date,
-        'quantity': inv.current_quantity
-    } for inv in data])
-    
-    df['date'] = pd.to_datetime(df['date'])
-    df_monthly = df.set_index('date').resample('M').last().reset_index()
-    df_monthly['quantity'] = df_monthly['quantity'].ffill().fillna(0)
+    year, month = func.extract("year", InventoryManagement.date), func.extract("month", InventoryManagement.date)
+    ranked = select(
+        year.label("year"), month.label("month"), InventoryManagement.current_quantity.label("quantity"),
+        func.row_number().over(
+            partition_by=(year, month),
+            order_by=(InventoryManagement.date.desc(), InventoryManagement.inventory_idx.desc()),
+        ).label("position"),
+    ).where(InventoryManagement.date.is_not(None), InventoryManagement.current_quantity.is_not(None)).subquery()
+    rows = db.execute(select(ranked.c.year, ranked.c.month, ranked.c.quantity).where(ranked.c.position == 1))
+    quantities = {month_key(int(key_year), int(key_month)): int(quantity) for key_year, key_month, quantity in rows}
+    return monthly_history(quantities, month_key(first.year, first.month), month_key(last.year, last.month), lambda previous: previous or 0)
 
-    return {row['date'].strftime('%Y-%m'): int(row['quantity']) for _, row in df_monthly.iterrows()}
+#품번/라인별 월 생산량 (GROUP BY 한 번으로 모든 그룹의 시계열 조회)
+FORECAST_GROUPS = {
+    "item_number": Production.item_number,
+    "line": Production.line,
+}
+
+def get_history_by_group(db: Session, group: str):
+    column = FORECAST_GROUPS[group]
+    year, month = func.extract("year", Production.date), func.extract("month", Production.date)
+    rows = db.execute(
+        select(column, year, month, func.sum(Production.produced_quantity))
+        .where(column.is_not(None), Production.date.is_not(None))
+        .group_by(column, year, month)
+    )
+    histories = {}
+    for key, key_year, key_month, quantity in rows:
+        histories.setdefault(key, {})[f"{int(key_year)}-{int(key_month):02d}"] = int(quantity or 0)
+    return histories
+
+#예측한 그룹 값의 이전 예측을 지우고 새 결과로 교체 (시간 예산 때문에 건너뛴 그룹 값은 이전 예측 유지)
+def save_forecasts(db: Session, group: str, method: str, results: dict):
+    table = Forecast.__table__
+    created_at = datetime.now()
+    rows = [
+        {"group_type": group, "group_key": key, "metric": metric, "period": datetime.strptime(period, "%Y-%m").date(),
+         "value": value, "method": method, "created_at": created_at}
+        for key, metrics in results.items()
+        for metric, values in metrics.items()
+        for period, value in values.items()
+    ]
+    try:
+        keys = list(results)
+        for start in range(0, len(keys), BULK_CHUNK_SIZE):
+            db.execute(delete(table).where(table.c.group_type == group, table.c.group_key.in_(keys[start:start + BULK_CHUNK_SIZE])))
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            db.execute(insert(table), rows[start:start + BULK_CHUNK_SIZE])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(rows)
+
+def get_forecasts(db: Session, group: str, key: Optional[str] = None, metric: Optional[str] = None):
+    conditions = [Forecast.group_type == group]
+    if key is not None:
+        conditions.append(Forecast.group_key == key)
+    if metric is not None:
+        conditions.append(Forecast.metric == metric)
+    rows = db.execute(
+        select(Forecast.group_key, Forecast.metric, Forecast.period, Forecast.value, Forecast.method, Forecast.created_at)
+        .where(*conditions)
+        .order_by(Forecast.group_key, Forecast.metric, Forecast.period)
+    )
+    return rows_to_dicts(rows)
 
 def get_facility_status_by_date(db: Session, target_date: datetime.date):
-    data = db.query(FacilityStatus).filter(FacilityStatus.date == target_date).all()
-    return [d.__dict__ for d in data]
\ No newline at end of file
+    data = db.query(FacilityStatus.date, FacilityStatus.line, FacilityStatus.produced_quantity, FacilityStatus.operating_time, FacilityStatus.non_operating_time)\
+        .filter(FacilityStatus.date == target_date).all()
+    return rows_to_dicts(data)
\ No newline at end of file
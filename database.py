@@ -1,16 +1,237 @@
 # database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+from bisect import bisect_left
+from threading import Lock
+import asyncio
+import logging
+import time
 import os
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
+# 읽기 전용 복제본 URL 목록 (콤마로 구분, 없으면 primary만 사용)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+REPLICA_HEALTH_INTERVAL = float(os.getenv("DB_REPLICA_HEALTH_INTERVAL", "10"))
+
+# 커넥션 풀 설정 (uvicorn 워커 수에 맞춰 환경변수로 조정)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# 커넥션 대기시간 히스토그램 구간 (ms)
+WAIT_BUCKETS_MS = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = Lock()
+        self.counts = {"connect": 0, "checkout": 0, "checkin": 0, "invalidate": 0, "close": 0, "timeout": 0}
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+
+    def count(self, key: str):
+        with self.lock:
+            self.counts[key] += 1
+
+    def observe_wait(self, elapsed_ms: float):
+        with self.lock:
+            self.wait_buckets[bisect_left(WAIT_BUCKETS_MS, elapsed_ms)] += 1
+            self.wait_total_ms += elapsed_ms
+            self.wait_max_ms = max(self.wait_max_ms, elapsed_ms)
+
+    def snapshot(self, pool):
+        with self.lock:
+            waits = sum(self.wait_buckets)
+            histogram = {f"le_{bound}ms": n for bound, n in zip(WAIT_BUCKETS_MS, self.wait_buckets)}
+            histogram["inf"] = self.wait_buckets[-1]
+            result = {
+                "pool": type(pool).__name__,
+                "events": dict(self.counts),
+                "wait_ms": {
+                    "count": waits,
+                    "avg": self.wait_total_ms / waits if waits else 0.0,
+                    "max": self.wait_max_ms,
+                    "histogram": histogram,
+                },
+            }
+        if isinstance(pool, QueuePool):
+            result.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return result
+
+# connect() 호출부터 커넥션을 받을 때까지의 시간을 기록하는 풀
+class TimedPoolMixin:
+    metrics: PoolMetrics = None
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            if self.metrics:
+                self.metrics.count("timeout")
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.observe_wait((time.perf_counter() - start) * 1000)
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+pool_metrics = {}
+
+def pool_options(url, poolclass):
+    # sqlite는 기본 풀을 그대로 사용
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return dict(
+        poolclass=poolclass,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING,
+    )
+
+def track_pool(name: str, sync_engine):
+    metrics = PoolMetrics(name)
+    pool = sync_engine.pool
+    if isinstance(pool, TimedPoolMixin):
+        pool.metrics = metrics
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.count("connect")
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.count("checkout")
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.count("checkin")
+
+    @event.listens_for(pool, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.count("invalidate")
+
+    @event.listens_for(pool, "close")
+    def on_close(dbapi_connection, connection_record):
+        metrics.count("close")
+
+    pool_metrics[name] = (sync_engine, metrics)
+
+def get_pool_status():
+    status = {name: metrics.snapshot(sync_engine.pool) for name, (sync_engine, metrics) in pool_metrics.items()}
+    for name, health in replica_router.status().items():
+        status[name].update(health)
+    return status
+
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL, TimedQueuePool))
+track_pool("sync", engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 동기 드라이버 URL을 async 드라이버 URL로 변환 (ASYNC_DATABASE_URL이 있으면 그대로 사용)
+ASYNC_DRIVERS = {
+    "mysql": "mysql+asyncmy",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str):
+    sync_url = make_url(url)
+    backend = sync_url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"async driver not configured for '{backend}'")
+    return sync_url.set(drivername=ASYNC_DRIVERS[backend])
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, TimedAsyncAdaptedQueuePool))
+track_pool("async", async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# 복제본 상태 확인 결과를 잠시 보관하고 round-robin으로 세션을 배분
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_async_engine(url, **pool_options(url, TimedAsyncAdaptedQueuePool))
+        self.sessionmaker = async_sessionmaker(bind=self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        self.healthy = False
+        self.lag = None
+        self.checked_at = 0.0
+        self.lock = asyncio.Lock()
+        track_pool(name, self.engine.sync_engine)
+
+    async def check(self):
+        async with self.lock:
+            if time.monotonic() - self.checked_at < REPLICA_HEALTH_INTERVAL:
+                return self.healthy
+            try:
+                async with self.engine.connect() as conn:
+                    self.lag = await replication_lag(conn)
+                self.healthy = self.lag is not None and self.lag <= REPLICA_MAX_LAG
+            except Exception as e:
+                logger.warning("replica %s health check failed: %s", self.name, e)
+                self.healthy, self.lag = False, None
+            self.checked_at = time.monotonic()
+            return self.healthy
+
+async def replication_lag(conn):
+    if conn.dialect.name != "mysql":
+        await conn.execute(text("SELECT 1"))
+        return 0.0
+    try:
+        row = (await conn.execute(text("SHOW REPLICA STATUS"))).mappings().first()
+        column = "Seconds_Behind_Source"
+    except Exception:
+        row = (await conn.execute(text("SHOW SLAVE STATUS"))).mappings().first()
+        column = "Seconds_Behind_Master"
+    # 복제 설정이 없는 서버는 primary와 같은 것으로 간주
+    if row is None:
+        return 0.0
+    lag = row.get(column)
+    return float(lag) if lag is not None else None
+
+class ReplicaRouter:
+    def __init__(self, urls):
+        self.replicas = [Replica(f"replica{i}", to_async_url(url)) for i, url in enumerate(urls)]
+        self.position = 0
+
+    async def sessionmaker(self):
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self.position % len(self.replicas)]
+            self.position += 1
+            if await replica.check():
+                return replica.sessionmaker
+        return AsyncSessionLocal
+
+    def status(self):
+        return {r.name: {"healthy": r.healthy, "lag": r.lag} for r in self.replicas}
+
+replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+
 Base = declarative_base()
 
 def get_db():
@@ -19,3 +240,18 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# 조회 전용 세션 (정상 복제본이 없으면 primary)
+@asynccontextmanager
+async def read_session():
+    session_factory = await replica_router.sessionmaker()
+    async with session_factory() as db:
+        yield db
+
+async def get_async_read_db():
+    async with read_session() as db:
+        yield db
@@ -0,0 +1,134 @@
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from zipfile import BadZipFile
+from models import Production, InventoryManagement
+import crud, schemas
+
+IMPORT_CHUNK_SIZE = 2000
+
+# 업로드 종류별 (검증 스키마, 저장 테이블)
+IMPORT_KINDS = {
+    "productions": (schemas.ProductionCreate, Production),
+    "inventories": (schemas.InventoryManagementCreate, InventoryManagement),
+}
+
+# 저장 중 기존 행(또는 파일 안의 앞쪽 행)과 유니크 키가 겹침, 파일 전체가 저장되지 않음
+class ImportConflict(Exception):
+    pass
+
+# 엑셀 한글 헤더 → 필드명 (필드명을 그대로 쓴 헤더도 허용)
+HEADER_ALIASES = {
+    "날짜": "date",
+    "일자": "date",
+    "라인": "line",
+    "작업자": "operator",
+    "품번": "item_number",
+    "품명": "item_name",
+    "모델": "model",
+    "목표수량": "target_quantity",
+    "생산수량": "produced_quantity",
+    "생산효율": "production_efficiency",
+    "공정": "process",
+    "가동시간": "operating_time",
+    "비가동시간": "non_operating_time",
+    "근무조": "shift",
+    "주야": "shift",
+    "라인효율": "line_efficiency",
+    "규격": "specification",
+    "단가": "price",
+    "기초수량": "basic_quantity",
+    "기초금액": "basic_amount",
+    "입고수량": "in_quantity",
+    "입고금액": "in_amount",
+    "불량입고수량": "defective_in_quantity",
+    "불량입고금액": "defective_in_amount",
+    "출고수량": "out_quantity",
+    "출고금액": "out_amount",
+    "조정수량": "adjustment_quantity",
+    "현재고수량": "current_quantity",
+    "현재고금액": "current_amount",
+    "LOT현재고수량": "lot_current_quantity",
+    "차이수량": "difference_quantity",
+    "거래처코드": "account_idx",
+}
+
+def map_header(header_row, schema):
+    fields = schema.model_fields
+    columns = []
+    for cell in header_row:
+        name = str(cell).strip().replace(" ", "") if cell is not None else ""
+        field = name if name in fields else HEADER_ALIASES.get(name)
+        columns.append(field if field in fields else None)
+
+    missing = [name for name, field in fields.items() if field.is_required() and name not in columns]
+    if missing:
+        raise ValueError(f"missing columns: {', '.join(missing)}")
+    return columns
+
+def row_to_dict(values, columns):
+    row = {}
+    for field, value in zip(columns, values):
+        # 빈 셀은 넘기지 않아서 스키마 기본값이 적용되도록 함
+        if not field or value is None or value == "":
+            continue
+        # 엑셀 날짜 셀은 datetime으로 읽히므로 date 컬럼은 날짜만 사용
+        if field == "date" and isinstance(value, datetime):
+            value = value.date()
+        row[field] = value
+    return row
+
+# read-only 모드로 한 행씩 읽어서 chunk 단위로 검증/저장 (파일 전체를 메모리에 올리지 않음)
+# 저장은 파일 전체를 하나의 트랜잭션으로 처리해서 중간에 실패하면 아무것도 저장되지 않음
+def import_workbook(db: Session, file, kind: str, sheet: str = None):
+    schema, model = IMPORT_KINDS[kind]
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException) as e:
+        raise ValueError("not a valid .xlsx file") from e
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("empty sheet")
+        columns = map_header(header, schema)
+
+        inserted = 0
+        errors = []
+        chunk = []
+        chunk_row_numbers = []
+
+        def flush():
+            nonlocal inserted
+            valid, chunk_errors = schemas.validate_rows(schema, chunk)
+            for error in chunk_errors:
+                errors.append({"row": chunk_row_numbers[error.index], "errors": error.errors})
+            if valid:
+                try:
+                    inserted += len(crud.insert_rows(db, model, [row.model_dump() for _, row in valid]))
+                except IntegrityError as e:
+                    raise ImportConflict(f"rows {chunk_row_numbers[0]}-{chunk_row_numbers[-1]} conflict with existing rows or earlier rows in the file; nothing was imported") from e
+            chunk.clear()
+            chunk_row_numbers.clear()
+
+        # 엑셀 행 번호는 헤더가 1행
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None or value == "" for value in values):
+                continue
+            chunk.append(row_to_dict(values, columns))
+            chunk_row_numbers.append(row_number)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush()
+        if chunk:
+            flush()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        workbook.close()
+
+    return {"inserted": inserted, "failed": len(errors), "errors": errors}
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+from database import read_session
+
+EXPORT_CHUNK_SIZE = 1000
+ARROW_BATCH_SIZE = 50000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+ARROW_TYPES = {
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    datetime.date: pa.date32(),
+    datetime.time: pa.time64("us"),
+}
+
+# 서버 측 커서로 chunk 단위로 읽어서 바로 내보냄 (응답 중에 세션을 직접 관리)
+async def stream_partitions(stmt, size: int = None):
+    async with read_session() as db:
+        result = await db.stream(stmt.execution_options(yield_per=size or EXPORT_CHUNK_SIZE))
+        async for rows in result.partitions():
+            yield rows
+
+async def stream_ndjson(stmt):
+    async for rows in stream_partitions(stmt):
+        yield "".join(json.dumps(row._asdict(), default=str, ensure_ascii=False) + "\n" for row in rows)
+
+async def stream_csv(stmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # 엑셀에서 한글이 깨지지 않도록 BOM 추가
+    buffer.write("\ufeff")
+    writer.writerow([column.name for column in stmt.selected_columns])
+
+    async for rows in stream_partitions(stmt):
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+# pyarrow writer가 쓴 바이트를 모아두었다가 chunk마다 꺼내가는 출력 스트림
+class ChunkSink(io.RawIOBase):
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def arrow_schema(stmt):
+    return pa.schema([pa.field(column.name, ARROW_TYPES[column.type.python_type]) for column in stmt.selected_columns])
+
+# 행을 컬럼 단위로 뒤집어서 바로 RecordBatch 생성
+def record_batch(rows, schema):
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays([pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema)
+
+async def stream_arrow(stmt, format: str):
+    schema = arrow_schema(stmt)
+    sink = ChunkSink()
+    if format == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    async for rows in stream_partitions(stmt, ARROW_BATCH_SIZE):
+        writer.write_batch(record_batch(rows, schema))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+def stream_export(stmt, format: str):
+    if format == "csv":
+        return stream_csv(stmt)
+    if format in ("arrow", "parquet"):
+        return stream_arrow(stmt, format)
+    return stream_ndjson(stmt)
@@ -0,0 +1,37 @@
+# 품번/라인별 주문량, 안전재고 일괄 예측 (결과는 forecasts 테이블에 품번/라인 단위로 교체 저장)
+# python forecast_batch.py                                   : 품번, 라인 모두 ARIMA로 예측
+# python forecast_batch.py --group item_number --method 이동평균법
+# python forecast_batch.py --workers 8 --time-budget 600     : ARIMA 병렬 프로세스 수, 그룹 종류별 시간 제한(초)
+import argparse
+import sys
+import time
+from database import SessionLocal
+import crud
+import forecasting
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast order volume and safety stock per item_number and line")
+    parser.add_argument("--group", choices=list(crud.FORECAST_GROUPS), action="append", help="group to forecast (default: all)")
+    parser.add_argument("--method", default="ARIMA", help="ARIMA, 지수평활법, 이동평균법")
+    parser.add_argument("--months", type=int, default=6, help="forecast horizon in months")
+    parser.add_argument("--lead-time", type=float, default=1, help="lead time used for safety stock")
+    parser.add_argument("--workers", type=int, default=None, help="ARIMA worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=forecasting.BATCH_CHUNK_SIZE, help="series per ARIMA task")
+    parser.add_argument("--time-budget", type=float, default=None, help="ARIMA time limit in seconds, applied separately to each group kind (unfinished chunks are stopped and skipped)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        for group in args.group or list(crud.FORECAST_GROUPS):
+            started = time.monotonic()
+            histories = crud.get_history_by_group(db, group)
+            options = {"workers": args.workers, "chunk_size": args.chunk_size, "time_budget": args.time_budget} if args.method == "ARIMA" else {}
+            results, skipped = forecasting.forecast_many(histories, args.method, args.months, args.lead_time, **options)
+            saved = crud.save_forecasts(db, group, args.method, results)
+            print(f"{group}: {len(results)} series forecast, {len(skipped)} skipped, {saved} rows saved in {time.monotonic() - started:.1f}s")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,85 @@
+import numpy as np
 import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.holtwinters import SimpleExpSmoothing
+from cachetools import LRUCache
+from multiprocessing import Pool, TimeoutError
+from dotenv import load_dotenv
+from threading import Lock
+import math
+import os
+import time
+
+load_dotenv()
+# 학습된 모델과 예측 결과 캐시: (방법, 과거 시계열) 기준이므로 월 데이터가 바뀌면 새 키가 되고 이전 항목은 LRU로 밀려남
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "256"))
+
+fitted_models = LRUCache(FORECAST_CACHE_SIZE)
+forecasts = LRUCache(FORECAST_CACHE_SIZE)
+cache_lock = Lock()
+
+def history_key(history_dict: dict, method: str):
+    return (method, tuple(sorted(history_dict.items())))
+
+# 여러 시계열을 한 번에 예측하는 NumPy 구현 (values: 시계열 수 x 기간 2차원 배열, 결과: 시계열 수 x steps)
+# 반복은 기간/예측 단계 방향으로만 하고 시계열 방향은 배열 연산으로 처리
+def moving_average_forecast(values, steps: int, window: int = 3):
+    history = np.asarray(values, dtype=float)[:, -window:]
+    result = np.empty((history.shape[0], steps))
+    for step in range(steps):
+        # 예측값도 다음 평균에 포함
+        result[:, step] = history.mean(axis=1)
+        history = np.column_stack((history[:, 1:], result[:, step]))
+    return result
+
+# 단순 지수평활: 초기 수준을 첫 값으로 두면 마지막 수준은 가중치 벡터와의 내적
+def simple_exp_smoothing_forecast(values, steps: int, alpha: float = 0.2):
+    values = np.asarray(values, dtype=float)
+    weights = alpha * (1 - alpha) ** np.arange(values.shape[1] - 1, -1, -1)
+    weights[0] = (1 - alpha) ** (values.shape[1] - 1)
+    return np.repeat((values @ weights)[:, None], steps, axis=1)
+
+# Holt 선형 추세: 초기 수준은 첫 값, 초기 추세는 첫 두 값의 차이
+def holt_forecast(values, steps: int, alpha: float = 0.2, beta: float = 0.1):
+    values = np.asarray(values, dtype=float)
+    level = values[:, 0]
+    trend = values[:, 1] - values[:, 0]
+    for t in range(values.shape[1]):
+        previous = level
+        level = alpha * values[:, t] + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous) + (1 - beta) * trend
+    return level[:, None] + trend[:, None] * np.arange(1, steps + 1)
+
+def naive_forecast(values, steps: int):
+    values = np.asarray(values, dtype=float)
+    return np.repeat(values[:, -1:], steps, axis=1)
+
+# statsmodels는 ARIMA에만 사용
+def fit_model(series: pd.Series, method: str, key):
+    with cache_lock:
+        model_fit = fitted_models.get(key)
+    if model_fit is None:
+        from statsmodels.tsa.arima.model import ARIMA
+        model_fit = ARIMA(series, order=(1, 1, 0)).fit()
+        with cache_lock:
+            fitted_models[key] = model_fit
+    return model_fit
 
 def calculate_forecast(history_dict: dict, method: str, forecast_months: int):
     if not history_dict:
         return {}
 
+    key = history_key(history_dict, method)
+    with cache_lock:
+        cached = forecasts.get((key, forecast_months))
+    if cached is not None:
+        return dict(cached)
+
+    result_dict = fit_forecast(history_dict, method, forecast_months, key)
+    with cache_lock:
+        forecasts[(key, forecast_months)] = result_dict
+    return dict(result_dict)
+
+def fit_forecast(history_dict: dict, method: str, forecast_months: int, key):
+
     dates = list(history_dict.keys())
     values = list(history_dict.values())
     series = pd.Series(values, index=pd.to_datetime(dates))
@@ -19,24 +93,17 @@ def calculate_forecast(history_dict: dict, method: str, forecast_months: int):
 
     try:
         if method == "ARIMA":
-            model = ARIMA(series, order=(1, 1, 0))
-            model_fit = model.fit()
+            model_fit = fit_model(series, method, key)
             predictions = model_fit.forecast(steps=forecast_months)
 
         elif method == "지수평활법":
-            model = SimpleExpSmoothing(series)
-            model_fit = model.fit(smoothing_level=0.2, optimized=False)
-            predictions = model_fit.forecast(forecast_months)
+            predictions = simple_exp_smoothing_forecast([values], forecast_months)[0]
 
         elif method == "이동평균법":
-            temp_list = values.copy()
-            for _ in range(forecast_months):
-                next_val = sum(temp_list[-3:]) / 3
-                temp_list.append(next_val)
-            predictions = temp_list[-forecast_months:]
+            predictions = moving_average_forecast([values], forecast_months)[0]
             
         else:
-            predictions = [series.iloc[-1]] * forecast_months
+            predictions = naive_forecast([values], forecast_months)[0]
 
     except Exception as e:
         print(f"예측 모델 에러 발생: {e}")
@@ -51,6 +118,92 @@ def calculate_forecast(history_dict: dict, method: str, forecast_months: int):
     
     return result_dict
 
+# 품번/라인별 일괄 예측
+# 모든 시계열을 같은 기간(최근 history_months개월, 값이 없는 달은 0)으로 맞춰서 2차원 배열로 처리
+# ARIMA는 시계열마다 학습해야 하므로 chunk 단위로 프로세스 풀에서 병렬 실행하고, 시간 예산을 넘긴 chunk는 건너뜀
+SAFETY_Z_SCORE = 1.65
+BATCH_CHUNK_SIZE = 200
+BATCH_HISTORY_MONTHS = 12
+
+def align_histories(histories: dict, history_months: int = BATCH_HISTORY_MONTHS):
+    months = sorted({month for history in histories.values() for month in history})[-history_months:]
+    keys = list(histories)
+    values = np.array([[histories[key].get(month, 0) for month in months] for key in keys], dtype=float).reshape(len(keys), len(months))
+    return keys, months, values
+
+def future_months(last_month: str, forecast_months: int):
+    return [d.strftime("%Y-%m") for d in pd.date_range(start=last_month, periods=forecast_months + 1, freq='MS')[1:]]
+
+# 프로세스 풀에서 실행 (chunk 하나의 ARIMA 예측, 실패한 시계열은 평균값)
+def arima_chunk(values, steps: int):
+    import warnings
+    from statsmodels.tsa.arima.model import ARIMA
+    warnings.filterwarnings("ignore")
+    result = np.empty((len(values), steps))
+    for i, row in enumerate(values):
+        try:
+            result[i] = ARIMA(row, order=(1, 1, 0)).fit().forecast(steps=steps)
+        except Exception:
+            result[i] = row.mean()
+    return result
+
+def arima_chunk_at(task):
+    start, values, steps = task
+    return start, arima_chunk(values, steps)
+
+def arima_batch(values, steps: int, workers: int = None, chunk_size: int = BATCH_CHUNK_SIZE, time_budget: float = None):
+    result = np.full((len(values), steps), np.nan)
+    deadline = time.monotonic() + time_budget if time_budget else None
+    tasks = [(start, values[start:start + chunk_size], steps) for start in range(0, len(values), chunk_size)]
+    # with 블록을 나가면 pool.terminate(): 시간 예산을 넘겼을 때 실행 중인 chunk 프로세스도 바로 종료
+    with Pool(processes=workers) as pool:
+        chunks = pool.imap_unordered(arima_chunk_at, tasks)
+        for _ in tasks:
+            timeout = max(0, deadline - time.monotonic()) if deadline else None
+            try:
+                start, forecast = chunks.next(timeout)
+            except TimeoutError:
+                break
+            result[start:start + chunk_size] = forecast
+    return result
+
+def forecast_values(values, method: str, steps: int, **options):
+    if values.shape[1] < 3:
+        return np.repeat(values.mean(axis=1, keepdims=True), steps, axis=1)
+    if method == "ARIMA":
+        return arima_batch(values, steps, **options)
+    if method == "지수평활법":
+        return simple_exp_smoothing_forecast(values, steps)
+    if method == "이동평균법":
+        return moving_average_forecast(values, steps)
+    return naive_forecast(values, steps)
+
+# 안전재고: 과거 주문량 표준편차 * Z * sqrt(리드타임), 예측 기간 동안 같은 값
+def safety_stock_forecast(values, steps: int, lead_time: float):
+    std_dev = values.std(axis=1, ddof=1) if values.shape[1] > 1 else np.zeros(len(values))
+    return np.repeat((SAFETY_Z_SCORE * std_dev * math.sqrt(max(1, lead_time)))[:, None], steps, axis=1)
+
+# histories: {그룹 값: {"YYYY-MM": 수량}} → {그룹 값: {"order_volume": {월: 값}, "safety_stock": {월: 값}}}, 시간 예산 때문에 건너뛴 그룹 목록
+def forecast_many(histories: dict, method: str, forecast_months: int, lead_time: float = 1, **options):
+    if not histories:
+        return {}, []
+    keys, months, values = align_histories(histories)
+    future = future_months(months[-1], forecast_months)
+    orders = forecast_values(values, method, forecast_months, **options)
+    safety = safety_stock_forecast(values, forecast_months, lead_time)
+
+    results = {}
+    skipped = []
+    for i, key in enumerate(keys):
+        if np.isnan(orders[i]).any():
+            skipped.append(key)
+            continue
+        results[key] = {
+            "order_volume": {month: int(round(value)) for month, value in zip(future, orders[i])},
+            "safety_stock": {month: int(value) for month, value in zip(future, safety[i])},
+        }
+    return results, skipped
+
 # 과거 및 예측 데이터를 분석하여 간단한 코멘트를 생성: 추세 분석, 수치 요약, 코멘트.
 def generate_analysis_comment(df_history, df_pred, value_name, unit):
     if df_pred is None or df_pred.empty:
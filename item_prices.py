@@ -0,0 +1,113 @@
+from sqlalchemy import select, func, and_, or_, delete
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from datetime import date
+from models import InventoryManagement, MaterialInvenManagement, ItemPrice
+
+# item_prices 유지: (source, item_name, 월) 마다 그 달 마지막 재고 행(날짜, idx 순)의 단가
+# 재고 행을 쓰기 전에 영향을 받은 (source, item_name, 월) 단가 행을 잠그고(lock), 쓴 뒤에 그 키만 다시 계산함
+# (같은 키를 쓰는 트랜잭션은 순서대로 처리되고, 계산은 잠근 뒤 최신 commit 기준으로 읽음)
+SOURCES = {
+    InventoryManagement: "inventory",
+    MaterialInvenManagement: "material",
+}
+SOURCE_MODELS = {source: model for model, source in SOURCES.items()}
+
+KEY_FIELDS = ("item_name", "date")
+
+# 한 번에 다시 계산할 키 수 (OR 조건 길이 제한)
+REFRESH_CHUNK_SIZE = 500
+
+def month_start(value: date):
+    return date(value.year, value.month, 1)
+
+def next_month(value: date):
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+def keys_for_rows(model, rows):
+    source = SOURCES[model]
+    return {(source, row["item_name"], month_start(row["date"])) for row in rows if row.get("item_name") and row.get("date")}
+
+def keys_for_query(db: Session, model, conditions: list, lock: bool = False):
+    source = SOURCES[model]
+    stmt = select(model.item_name, model.date).where(*conditions).distinct()
+    rows = db.execute(stmt.with_for_update() if lock else stmt)
+    return {(source, item_name, month_start(row_date)) for item_name, row_date in rows if item_name and row_date}
+
+def keys_after_update(model, keys: set, changes: dict):
+    if not any(field in changes for field in KEY_FIELDS):
+        return set(keys)
+    result = set()
+    for source, item_name, period in keys:
+        item_name = changes.get("item_name") or item_name
+        if changes.get("date") is not None:
+            period = month_start(changes["date"])
+        result.add((source, item_name, period))
+    return result
+
+def key_filter(table, keys):
+    return or_(*[and_(table.c.source == source, table.c.item_name == item_name, table.c.period == period) for source, item_name, period in keys])
+
+def upsert_statement(db: Session, rows: list, price=None):
+    table = ItemPrice.__table__
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        return stmt.on_duplicate_key_update(price=stmt.inserted.price if price is None else price)
+    stmt = sqlite_insert(table).values(rows)
+    return stmt.on_conflict_do_update(index_elements=["source", "item_name", "period"], set_={"price": stmt.excluded.price if price is None else price})
+
+# 원본 쓰기 전에 키마다 단가 행을 만들어 두고(이미 있으면 그대로) FOR UPDATE로 잠금
+# DELETE 후 INSERT는 없는 키에 gap lock을 잡아서 같은 새 달을 동시에 쓰면 교착되므로 upsert로 행을 먼저 잡음
+# (여러 키를 같은 순서로 잠그도록 정렬)
+def lock(db: Session, keys: set):
+    table = ItemPrice.__table__
+    keys = sorted(keys)
+    for start in range(0, len(keys), REFRESH_CHUNK_SIZE):
+        chunk = keys[start:start + REFRESH_CHUNK_SIZE]
+        rows = [{"source": source, "item_name": item_name, "period": period, "price": None} for source, item_name, period in chunk]
+        db.execute(upsert_statement(db, rows, price=table.c.price))
+        db.execute(select(table.c.price_idx).where(key_filter(table, chunk)).order_by(table.c.source, table.c.item_name, table.c.period).with_for_update())
+
+# 잠근 뒤 공유 잠금 조회로 계산해서 다른 트랜잭션이 먼저 commit한 재고 행도 포함
+def compute(db: Session, model, keys: list):
+    pk = model.__mapper__.primary_key[0]
+    conditions = or_(*[and_(model.item_name == item_name, model.date >= period, model.date < next_month(period)) for _, item_name, period in keys])
+    rows = db.execute(
+        select(model.item_name, model.date, model.price)
+        .where(conditions, model.price.is_not(None))
+        .order_by(model.date, pk)
+        .with_for_update(read=True)
+    )
+    # 날짜, idx 오름차순이므로 마지막 값이 그 달 마지막 단가
+    return {(SOURCES[model], item_name, month_start(row_date)): price for item_name, row_date, price in rows}
+
+# 영향을 받은 키의 단가를 다시 계산해서 upsert, 재고 행이 없어진 키는 삭제 (commit은 호출한 쪽에서)
+def refresh(db: Session, keys: set):
+    table = ItemPrice.__table__
+    keys = sorted(keys)
+    for start in range(0, len(keys), REFRESH_CHUNK_SIZE):
+        chunk = keys[start:start + REFRESH_CHUNK_SIZE]
+        prices = {}
+        for source, model in SOURCE_MODELS.items():
+            source_keys = [key for key in chunk if key[0] == source]
+            if source_keys:
+                prices.update(compute(db, model, source_keys))
+
+        if prices:
+            db.execute(upsert_statement(db, [
+                {"source": source, "item_name": item_name, "period": period, "price": price}
+                for (source, item_name, period), price in sorted(prices.items())
+            ]))
+        removed = [key for key in chunk if key not in prices]
+        if removed:
+            db.execute(delete(table).where(key_filter(table, removed)))
+
+# 기준월 시점의 품목별 최신 단가 (기준월 이전 중 가장 최근 달의 단가)
+def latest_prices(source: str, period: date):
+    latest = select(ItemPrice.item_name, func.max(ItemPrice.period).label("period"))\
+        .where(ItemPrice.source == source, ItemPrice.period <= period)\
+        .group_by(ItemPrice.item_name).subquery()
+    return select(ItemPrice.item_name, ItemPrice.price)\
+        .join(latest, and_(ItemPrice.item_name == latest.c.item_name, ItemPrice.period == latest.c.period))\
+        .where(ItemPrice.source == source).subquery()
@@ -1,239 +1,465 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, Depends, HTTPException, Query, Body, UploadFile, File, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, ORJSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 import crud, schemas, datetime
-from database import get_db
-from typing import List
+import watermarks
+import change_log
+from database import SessionLocal, get_async_db, get_async_read_db, get_pool_status, read_session
+from cache import response_cache
+from typing import List, Optional, Any
 import forecasting
+import exports
+import excel_import
 import pandas as pd
 import math
+import asyncio
+
+app = FastAPI(default_response_class=ORJSONResponse)
+
+#version 불일치(다른 단말기에서 먼저 수정)는 409로 응답
+@app.exception_handler(crud.VersionConflict)
+async def version_conflict_handler(request, exc: crud.VersionConflict):
+    return ORJSONResponse(status_code=409, content={"detail": str(exc)})
+
+#유니크 키 중복 (재고 스냅샷 등)은 409로 응답
+@app.exception_handler(IntegrityError)
+async def integrity_error_handler(request, exc: IntegrityError):
+    return ORJSONResponse(status_code=409, content={"detail": "Duplicate or conflicting row"})
 
-app = FastAPI()
 @app.get("/")
-def root():
+async def root():
     return None
 
+#쓰기 세션: 요청 중에 commit된 변경의 응답 캐시 무효화를 응답 전에 await
+async def get_write_db(db: AsyncSession = Depends(get_async_db)):
+    yield db
+    await response_cache.invalidate_committed(db)
+
+#목록 조회 공통 파라미터
+def page_params(limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE), after: Optional[str] = None):
+    try:
+        after_id = crud.decode_cursor(after) if after else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"limit": limit, "after": after_id}
+
+def export_response(stmt, format: str, filename: str):
+    return StreamingResponse(
+        exports.stream_export(stmt, format),
+        media_type=exports.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
+
+def list_filters(start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None, account_idx: Optional[int] = None):
+    return {"start_date": start_date, "end_date": end_date, "account_idx": account_idx}
+
+#fields=date,line,... 컬럼 선택 파라미터 (스키마 필드 기준으로 검증)
+def fields_param(schema):
+    def parse_fields(fields: Optional[str] = None):
+        if not fields:
+            return None
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in schema.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return names
+    return parse_fields
+
+#DB에서 읽은 행(dict)은 response_model 재검증 없이 orjson으로 바로 직렬화
+#(fields로 일부 컬럼만 선택한 경우도 그대로 반환)
+def row_response(result):
+    return ORJSONResponse(content=result)
+
+#분석 응답 캐시: route와 파라미터로 저장하고, 의존하는 (테이블, 연도, 월) 데이터가 바뀌면 commit 후 무효화
+#계산하는 동안 무효화가 있었으면 저장하지 않음
+#캐시하는 route는 primary 세션(get_async_db)으로 계산: 복제본은 무효화 직후에도 commit 전 데이터를 돌려줄 수 있어서
+#그 값을 CACHE_TTL 동안 저장하게 됨 (캐시 hit은 DB를 읽지 않으므로 primary 부하는 miss일 때만)
+async def cached_response(route: str, params: dict, dependencies: list, compute):
+    key = response_cache.make_key(route, params)
+    value = await response_cache.get(key)
+    if value is None:
+        generation = response_cache.generation
+        value = jsonable_encoder(await compute())
+        await response_cache.set(key, value, dependencies, generation)
+    return ORJSONResponse(content=value)
+
+def previous_month_dependency(table: str, year: int, month: int):
+    previous_year, previous_month = crud.previous_month_of(year, month)
+    return (table, previous_year, previous_month)
+
+#조건부 GET: 테이블/월 변경 카운터로 ETag를 만들고, If-None-Match가 같으면 조회 없이 304
+async def conditional_response(request: Request, db: AsyncSession, table: str, year: int, month: int, compute):
+    etag = await db.run_sync(watermarks.etag, table, year, month)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if watermarks.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response = row_response(await compute())
+    response.headers.update(headers)
+    return response
+
+#bulk insert 공통 처리 (partial=True면 오류 행만 제외하고 저장)
+async def bulk_create(db: AsyncSession, schema, crud_func, rows: List[Any], partial: bool):
+    valid, errors = schemas.validate_rows(schema, rows)
+    if errors and not partial:
+        raise HTTPException(status_code=422, detail=jsonable_encoder(errors))
+
+    ids = [None] * len(rows)
+    if valid:
+        inserted_ids = await db.run_sync(crud_func, [model for _, model in valid])
+        for (index, _), inserted_id in zip(valid, inserted_ids):
+            ids[index] = inserted_id
+    return {"ids": ids, "errors": errors}
+
+#bulk upsert 공통 처리 (검증은 bulk insert와 동일)
+async def bulk_upsert(db: AsyncSession, schema, crud_func, rows: List[Any], partial: bool):
+    valid, errors = schemas.validate_rows(schema, rows)
+    if errors and not partial:
+        raise HTTPException(status_code=422, detail=jsonable_encoder(errors))
+
+    upserted = await db.run_sync(crud_func, [model for _, model in valid]) if valid else 0
+    return {"upserted": upserted, "errors": errors}
+
+#조건 일괄 수정/삭제 공통 처리 (조건이 없거나 바꿀 필드가 없으면 400)
+async def bulk_write(db: AsyncSession, crud_func, *args, dry_run: bool):
+    try:
+        affected = await db.run_sync(crud_func, *args, dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"affected": affected, "dry_run": dry_run}
+
+def production_bulk_filters(start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None, operator: Optional[str] = None, item_number: Optional[str] = None, item_name: Optional[str] = None):
+    return {"start_date": start_date, "end_date": end_date, "operator": operator, "item_number": item_number, "item_name": item_name}
+
+def inventory_bulk_filters(start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None, item_number: Optional[str] = None, item_name: Optional[str] = None):
+    return {"start_date": start_date, "end_date": end_date, "item_number": item_number, "item_name": item_name}
+
+def material_bulk_filters(start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None, client: Optional[str] = None, item_number: Optional[str] = None, item_name: Optional[str] = None):
+    return {"start_date": start_date, "end_date": end_date, "client": client, "item_number": item_number, "item_name": item_name}
+
 #plan 엔드포인트
 @app.post("/plans/", response_model=schemas.PlanCreate)
-def create_plan(plan: schemas.PlanCreate, db: Session = Depends(get_db)):
-    return crud.create_plan(db, plan)
+async def create_plan(plan: schemas.PlanCreate, db: AsyncSession = Depends(get_write_db)):
+    return await db.run_sync(crud.create_plan, plan)
 
-@app.get("/plans/all/", response_model=List[schemas.PlanBase])
-def get_all_plans(db: Session = Depends(get_db)):
-    return crud.get_all_plans(db)
+@app.get("/plans/all/", response_model=schemas.Page[schemas.PlanBase])
+async def get_all_plans(account_idx: Optional[int] = None, page: dict = Depends(page_params), fields: Optional[List[str]] = Depends(fields_param(schemas.PlanBase)), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_all_plans, **page, account_idx=account_idx, fields=fields))
 
 @app.get("/plans/rate/{year}", response_model=List[schemas.PlanResponse])
-def get_plans_rate(year: int, db: Session = Depends(get_db)):
-    return crud.get_plans_rate_for_year(db, year)
+async def get_plans_rate(year: int, db: AsyncSession = Depends(get_async_db)):
+    dependencies = [("plans", year, None), ("productions", year, None)]
+    return await cached_response("plans_rate", {"year": year}, dependencies, lambda: db.run_sync(crud.get_plans_rate_for_year, year))
 
 @app.put("/plans/{plan_id}", response_model=schemas.PlanUpdate)
-def update_plan(plan_id: int, plan_update: schemas.PlanUpdate, db: Session = Depends(get_db)):
-    updated_plan = crud.update_plan(db, plan_id, plan_update)
+async def update_plan(plan_id: int, plan_update: schemas.PlanUpdate, db: AsyncSession = Depends(get_write_db)):
+    updated_plan = await db.run_sync(crud.update_plan, plan_id, plan_update)
     if not updated_plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     return updated_plan
 
 @app.delete("/plans/{plan_id}")
-def delete_plan(plan_id: int, db: Session = Depends(get_db)):
-    deleted_plan = crud.delete_plan(db, plan_id)
+async def delete_plan(plan_id: int, db: AsyncSession = Depends(get_write_db)):
+    deleted_plan = await db.run_sync(crud.delete_plan, plan_id)
     if not deleted_plan:
         raise HTTPException(status_code=404, detail="Plan not found")
     return {"detail": "Plan deleted"}
 
 @app.get("/plans/rates/{year},{month}", response_model=List[schemas.PlanResponse2])
-def get_plan_rate_month(year: int, month: int, db: Session = Depends(get_db)):
-    plans = crud.get_plan_rate_for_month(db, year, month)
-    return plans
+async def get_plan_rate_month(year: int, month: int, db: AsyncSession = Depends(get_async_db)):
+    dependencies = [("plans", year, month), previous_month_dependency("plans", year, month), ("inventory_managements", None, None)]
+    return await cached_response("plan_rate_month", {"year": year, "month": month}, dependencies, lambda: db.run_sync(crud.get_plan_rate_for_month, year, month))
+
+#기간 전체의 월별 상승률 (쿼리 한 번)
+@app.get("/plans/rates/series/", response_model=List[schemas.PlanResponse2])
+async def get_plan_rate_series(start_year: int, start_month: int = Query(..., ge=1, le=12), end_year: int = ..., end_month: int = Query(..., ge=1, le=12), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_plan_rate_series, start_year, start_month, end_year, end_month))
 
 #production 엔드포인트
 @app.post("/productions/", response_model=schemas.ProductionCreate)
-def create_production(production: schemas.ProductionCreate, db: Session = Depends(get_db)):
-    return crud.create_production(db, production)
+async def create_production(production: schemas.ProductionCreate, db: AsyncSession = Depends(get_write_db)):
+    return await db.run_sync(crud.create_production, production)
+
+@app.post("/productions/bulk", response_model=schemas.BulkInsertResponse)
+async def create_productions_bulk(rows: List[Any] = Body(...), partial: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_create(db, schemas.ProductionCreate, crud.create_productions_bulk, rows, partial)
 
-@app.get("/productions/all/", response_model=List[schemas.ProductionBase])
-def get_all_productions(db: Session = Depends(get_db)):
-    return crud.get_all_productions(db)
+#{production_id} 경로보다 먼저 선언해야 함
+@app.patch("/productions/bulk", response_model=schemas.BulkWriteResponse)
+async def update_productions_bulk(changes: schemas.ProductionUpdate, filters: dict = Depends(production_bulk_filters), dry_run: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_write(db, crud.bulk_update_productions, filters, changes, dry_run=dry_run)
+
+@app.delete("/productions/bulk", response_model=schemas.BulkWriteResponse)
+async def delete_productions_bulk(filters: dict = Depends(production_bulk_filters), dry_run: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_write(db, crud.bulk_delete_productions, filters, dry_run=dry_run)
+
+@app.get("/productions/all/", response_model=schemas.Page[schemas.ProductionBase])
+async def get_all_productions(page: dict = Depends(page_params), filters: dict = Depends(list_filters), fields: Optional[List[str]] = Depends(fields_param(schemas.ProductionBase)), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_all_productions, **page, **filters, fields=fields))
+
+@app.get("/productions/export")
+async def export_productions(start_date: datetime.date = None, end_date: datetime.date = None, operator: str=None, item_number: str=None, item_name: str=None, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    stmt = crud.get_productions_export_query(start_date, end_date, operator, item_number, item_name)
+    return export_response(stmt, format, "productions")
 
 @app.get("/productions/efficiency/{year}", response_model=List[schemas.ProductionResponse])
-def get_production_efficiency(year: int, db: Session = Depends(get_db)):
-    return crud.get_production_efficiency_for_year(db, year)
+async def get_production_efficiency(year: int, db: AsyncSession = Depends(get_async_db)):
+    dependencies = [("productions", year, None)]
+    return await cached_response("production_efficiency", {"year": year}, dependencies, lambda: db.run_sync(crud.get_production_efficiency_for_year, year))
+
+#기간별 집계 (end_date는 포함하지 않음), by: year|month|week|day 중 하나와 shift, line 조합
+@app.get("/productions/rollup/")
+async def get_production_rollup(start_date: datetime.date, end_date: datetime.date, by: str = "month", db: AsyncSession = Depends(get_async_read_db)):
+    buckets = [name.strip() for name in by.split(",") if name.strip()]
+    unknown = [name for name in buckets if name not in ("year", "month", "week", "day", "shift", "line")]
+    if unknown or not buckets:
+        raise HTTPException(status_code=400, detail=f"Unknown buckets: {', '.join(unknown)}")
+    try:
+        return row_response(await db.run_sync(crud.get_production_rollup, buckets, start_date, end_date))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/productions/{year}", response_model=List[schemas.ProductionBase])
-def get_production(year: int, db: Session = Depends(get_db)):
-    production = crud.get_production_year(db, year)
+async def get_production(year: int, fields: Optional[List[str]] = Depends(fields_param(schemas.ProductionBase)), db: AsyncSession = Depends(get_async_read_db)):
+    production = await db.run_sync(crud.get_production_year, year, fields)
     if production is None:
         raise HTTPException(status_code=404, detail="Production not found")
-    return production
+    return row_response(production)
 
 @app.get("/productions/day/{date}", response_model=List[schemas.ProductionBase])
-def get_day_production_data(date: datetime.date,  db: Session = Depends(get_db)):
-    production = crud.get_day_production(db, date)
-    if production is None:
-        raise HTTPException(status_code=404, detail="Production not found")
-    return production
+async def get_day_production_data(date: datetime.date, request: Request, fields: Optional[List[str]] = Depends(fields_param(schemas.ProductionBase)), db: AsyncSession = Depends(get_async_read_db)):
+    async def compute():
+        production = await db.run_sync(crud.get_day_production, date, fields)
+        if production is None:
+            raise HTTPException(status_code=404, detail="Production not found")
+        return production
+    return await conditional_response(request, db, "productions", date.year, date.month, compute)
 
 @app.get("/productions/days/", response_model=List[schemas.ProductionBase])
-def get_days_production_data(start_date: datetime.date, end_date: datetime.date, operator: str=None, item_number: str=None, item_name: str=None, db: Session = Depends(get_db)):
-    production = crud.get_days_production(db, start_date, end_date, operator, item_number, item_name)
+async def get_days_production_data(start_date: datetime.date, end_date: datetime.date, operator: str=None, item_number: str=None, item_name: str=None, fields: Optional[List[str]] = Depends(fields_param(schemas.ProductionBase)), db: AsyncSession = Depends(get_async_read_db)):
+    production = await db.run_sync(crud.get_days_production, start_date, end_date, operator, item_number, item_name, fields)
     if production is None:
         raise HTTPException(status_code=404, detail="Production not found")
-    return production
+    return row_response(production)
 
 @app.get("/productions/id/{production_id}", response_model=schemas.ProductionBase)
-def get_production(production_id: int, db: Session = Depends(get_db)):
-    production = crud.get_production(db, production_id)
+async def get_production(production_id: int, fields: Optional[List[str]] = Depends(fields_param(schemas.ProductionBase)), db: AsyncSession = Depends(get_async_read_db)):
+    production = await db.run_sync(crud.get_production, production_id, fields)
     if production is None:
         raise HTTPException(status_code=404, detail="Production not found")
-    return production.__dict__
+    return row_response(production)
 
 @app.put("/productions/{production_id}", response_model=schemas.ProductionUpdate)
-def update_production(production_id: int, productions_update: schemas.ProductionUpdate, db: Session = Depends(get_db)):
-    updated_productions = crud.update_production(db, production_id, productions_update)
+async def update_production(production_id: int, productions_update: schemas.ProductionUpdate, db: AsyncSession = Depends(get_write_db)):
+    updated_productions = await db.run_sync(crud.update_production, production_id, productions_update)
     if not updated_productions:
         raise HTTPException(status_code=404, detail="Production not found")
     return updated_productions
 
 @app.delete("/productions/{production_id}")
-def delete_production(production_id: int, db: Session = Depends(get_db)):
-    deleted_production = crud.delete_production(db, production_id)
+async def delete_production(production_id: int, db: AsyncSession = Depends(get_write_db)):
+    deleted_production = await db.run_sync(crud.delete_production, production_id)
     if not deleted_production:
         raise HTTPException(status_code=404, detail="Production not found")
     return {"detail": "Production deleted"}
 
 #inventory 엔드포인트
 @app.post("/inventories/", response_model=schemas.InventoryManagementCreate)
-def create_inventory_management(inventory: schemas.InventoryManagementCreate, db: Session = Depends(get_db)):
-    return crud.create_inventory_management(db=db, inventory=inventory)
+async def create_inventory_management(inventory: schemas.InventoryManagementCreate, db: AsyncSession = Depends(get_write_db)):
+    return await db.run_sync(crud.create_inventory_management, inventory)
+
+@app.post("/inventories/bulk", response_model=schemas.BulkInsertResponse)
+async def create_inventories_bulk(rows: List[Any] = Body(...), partial: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_create(db, schemas.InventoryManagementCreate, crud.create_inventories_bulk, rows, partial)
 
-@app.get("/inventories/all/", response_model=List[schemas.InventoryManagementBase])
-def get_all_inventories(db: Session = Depends(get_db)):
-    return crud.get_all_inventories(db=db)
+#일별 재고 스냅샷 (date, item_number, account_idx가 같으면 덮어씀)
+@app.post("/inventories/upsert", response_model=schemas.UpsertResponse)
+async def upsert_inventories(rows: List[Any] = Body(...), partial: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_upsert(db, schemas.InventoryManagementCreate, crud.upsert_inventories, rows, partial)
+
+@app.patch("/inventories/bulk", response_model=schemas.BulkWriteResponse)
+async def update_inventories_bulk(changes: schemas.InventoryManagementUpdate, filters: dict = Depends(inventory_bulk_filters), dry_run: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_write(db, crud.bulk_update_inventories, filters, changes, dry_run=dry_run)
+
+@app.delete("/inventories/bulk", response_model=schemas.BulkWriteResponse)
+async def delete_inventories_bulk(filters: dict = Depends(inventory_bulk_filters), dry_run: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_write(db, crud.bulk_delete_inventories, filters, dry_run=dry_run)
+
+@app.get("/inventories/all/", response_model=schemas.Page[schemas.InventoryManagementBase])
+async def get_all_inventories(page: dict = Depends(page_params), filters: dict = Depends(list_filters), fields: Optional[List[str]] = Depends(fields_param(schemas.InventoryManagementBase)), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_all_inventories, **page, **filters, fields=fields))
+
+@app.get("/inventories/export")
+async def export_inventories(start_date: datetime.date = None, end_date: datetime.date = None, item_number: str=None, item_name: str=None, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    stmt = crud.get_inventories_export_query(start_date, end_date, item_number, item_name)
+    return export_response(stmt, format, "inventory_managements")
 
 @app.get("/inventories/{inventory_id}", response_model=schemas.InventoryManagementBase)
-def get_inventory(inventory_id: int, db: Session = Depends(get_db)):
-    inventory = crud.get_inventory(db=db, inventory_id=inventory_id)
+async def get_inventory(inventory_id: int, fields: Optional[List[str]] = Depends(fields_param(schemas.InventoryManagementBase)), db: AsyncSession = Depends(get_async_read_db)):
+    inventory = await db.run_sync(crud.get_inventory, inventory_id, fields)
     if inventory is None:
         raise HTTPException(status_code=404, detail="Inventory not found")
-    return inventory.__dict__
+    return row_response(inventory)
 
 @app.get("/inventories/month/", response_model=List[schemas.InventoryManagementBase])
-def get_inventory_month(year: int, month: int, db: Session = Depends(get_db)):
-    inventory = crud.get_month_inventory(db, year, month)
-    return inventory
+async def get_inventory_month(year: int, month: int, request: Request, fields: Optional[List[str]] = Depends(fields_param(schemas.InventoryManagementBase)), db: AsyncSession = Depends(get_async_read_db)):
+    return await conditional_response(request, db, "inventory_managements", year, month, lambda: db.run_sync(crud.get_month_inventory, year, month, fields))
 
 @app.put("/inventories/{inventory_id}", response_model=schemas.InventoryManagementUpdate)
-def update_inventory(inventory_id: int, inventory_update: schemas.InventoryManagementUpdate, db: Session = Depends(get_db)):
-    updated_inventory = crud.update_inventory(db, inventory_id, inventory_update)
+async def update_inventory(inventory_id: int, inventory_update: schemas.InventoryManagementUpdate, db: AsyncSession = Depends(get_write_db)):
+    updated_inventory = await db.run_sync(crud.update_inventory, inventory_id, inventory_update)
     if not updated_inventory:
         raise HTTPException(status_code=404, detail="Inventory not found")
     return updated_inventory
 
 @app.delete("/inventories/{inventory_id}")
-def delete_inventory(inventory_id: int, db: Session = Depends(get_db)):
-    deleted_inventory = crud.delete_inventory(db, inventory_id)
+async def delete_inventory(inventory_id: int, db: AsyncSession = Depends(get_write_db)):
+    deleted_inventory = await db.run_sync(crud.delete_inventory, inventory_id)
     if not deleted_inventory:
         raise HTTPException(status_code=404, detail="Inventory not found")
     return {"detail": "Inventory deleted"}
 
 #material 엔드포인트
 @app.post("/materials/", response_model=schemas.MaterialCreate)
-def create_material(material: schemas.MaterialCreate, db: Session = Depends(get_db)):
-    return crud.create_materials(db=db, material=material)
+async def create_material(material: schemas.MaterialCreate, db: AsyncSession = Depends(get_write_db)):
+    return await db.run_sync(crud.create_materials, material)
+
+@app.post("/materials/bulk", response_model=schemas.BulkInsertResponse)
+async def create_materials_bulk(rows: List[Any] = Body(...), partial: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_create(db, schemas.MaterialCreate, crud.create_materials_bulk, rows, partial)
+
+@app.patch("/materials/bulk", response_model=schemas.BulkWriteResponse)
+async def update_materials_bulk(changes: schemas.MaterialUpdate, filters: dict = Depends(material_bulk_filters), dry_run: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_write(db, crud.bulk_update_materials, filters, changes, dry_run=dry_run)
 
-@app.get("/materials/all/", response_model=List[schemas.MaterialBase])
-def get_all_materials(db: Session = Depends(get_db)):
-    return crud.get_all_materials(db=db)
+@app.delete("/materials/bulk", response_model=schemas.BulkWriteResponse)
+async def delete_materials_bulk(filters: dict = Depends(material_bulk_filters), dry_run: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_write(db, crud.bulk_delete_materials, filters, dry_run=dry_run)
+
+@app.get("/materials/all/", response_model=schemas.Page[schemas.MaterialBase])
+async def get_all_materials(page: dict = Depends(page_params), filters: dict = Depends(list_filters), fields: Optional[List[str]] = Depends(fields_param(schemas.MaterialBase)), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_all_materials, **page, **filters, fields=fields))
 
 @app.get("/material/rate/{year}", response_model=List[schemas.MaterialResponse2])
-def get_material_rate(year: int, db: Session = Depends(get_db)):
-    return crud.get_material_rate_for_year(db, year)
+async def get_material_rate(year: int, db: AsyncSession = Depends(get_async_db)):
+    # material_plans는 이 API로 수정하지 않으므로 TTL로만 만료
+    dependencies = [("material_plans", year, None)]
+    return await cached_response("material_rate", {"year": year}, dependencies, lambda: db.run_sync(crud.get_material_rate_for_year, year))
 
 @app.get("/materials/rates/{year},{month}", response_model=List[schemas.MaterialResponse])
-def get_material_rate(year: int, month: int, db: Session = Depends(get_db)):
-    materials = crud.get_material_rate_for_month(db, year, month)
-    return materials
+async def get_material_rate(year: int, month: int, db: AsyncSession = Depends(get_async_db)):
+    dependencies = [("materials", year, month), previous_month_dependency("materials", year, month), ("material_invens_managements", None, None)]
+    return await cached_response("material_rate_month", {"year": year, "month": month}, dependencies, lambda: db.run_sync(crud.get_material_rate_for_month, year, month))
+
+#기간 전체의 월별 상승률 (쿼리 한 번)
+@app.get("/materials/rates/series/", response_model=List[schemas.MaterialResponse])
+async def get_material_rate_series(start_year: int, start_month: int = Query(..., ge=1, le=12), end_year: int = ..., end_month: int = Query(..., ge=1, le=12), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_material_rate_series, start_year, start_month, end_year, end_month))
 
 @app.put("/materials/{material_id}", response_model=schemas.MaterialUpdate)
-def update_material(material_id: int, material_update: schemas.MaterialUpdate, db: Session = Depends(get_db)):
-    updated_material = crud.update_material(db, material_id, material_update)
+async def update_material(material_id: int, material_update: schemas.MaterialUpdate, db: AsyncSession = Depends(get_write_db)):
+    updated_material = await db.run_sync(crud.update_material, material_id, material_update)
     if not updated_material:
         raise HTTPException(status_code=404, detail="Material not found")
     return updated_material
 
 @app.delete("/materials/{material_id}")
-def delete_material(material_id: int, db: Session = Depends(get_db)):
-    deleted_material = crud.delete_material(db, material_id)
+async def delete_material(material_id: int, db: AsyncSession = Depends(get_write_db)):
+    deleted_material = await db.run_sync(crud.delete_material, material_id)
     if not deleted_material:
         raise HTTPException(status_code=404, detail="Material not found")
     return {"detail": "Material deleted"}
 
-@app.get("/material_LOT/all/", response_model=List[schemas.MaterialInvenBase])
-def get_all_materials_LOT(db: Session = Depends(get_db)):
-    return crud.get_all_material_LOT(db=db)
+@app.get("/material_LOT/all/", response_model=schemas.Page[schemas.MaterialInvenBase])
+async def get_all_materials_LOT(page: dict = Depends(page_params), filters: dict = Depends(list_filters), fields: Optional[List[str]] = Depends(fields_param(schemas.MaterialInvenBase)), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_all_material_LOT, **page, **filters, fields=fields))
 
 #material_in_out 엔드포인트
 @app.post("/materials_in_out/", response_model=schemas.MaterialInOutManagementCreate)
-def create_in_out(material: schemas.MaterialInOutManagementCreate, db: Session = Depends(get_db)):
-    return crud.create_in_out(db=db, material=material)
+async def create_in_out(material: schemas.MaterialInOutManagementCreate, db: AsyncSession = Depends(get_write_db)):
+    return await db.run_sync(crud.create_in_out, material)
+
+@app.post("/materials_in_out/bulk", response_model=schemas.BulkInsertResponse)
+async def create_in_out_bulk(rows: List[Any] = Body(...), partial: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_create(db, schemas.MaterialInOutManagementCreate, crud.create_in_out_bulk, rows, partial)
 
-@app.get("/materials_in_out/all/", response_model=List[schemas.MaterialInOutManagementBase])
-def get_all_in_out(db: Session = Depends(get_db)):
-    return crud.get_all_materials_in_out(db=db)
+@app.get("/materials_in_out/all/", response_model=schemas.Page[schemas.MaterialInOutManagementBase])
+async def get_all_in_out(page: dict = Depends(page_params), filters: dict = Depends(list_filters), fields: Optional[List[str]] = Depends(fields_param(schemas.MaterialInOutManagementBase)), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_all_materials_in_out, **page, **filters, fields=fields))
 
 @app.put("/materials_in_out/{material_id}", response_model=schemas.MaterialInOutManagementUpdate)
-def update_in_out(material_id: int, material_update: schemas.MaterialInOutManagementUpdate, db: Session = Depends(get_db)):
-    updated_in_out = crud.update_material_in_out(db, material_id, material_update)
+async def update_in_out(material_id: int, material_update: schemas.MaterialInOutManagementUpdate, db: AsyncSession = Depends(get_write_db)):
+    updated_in_out = await db.run_sync(crud.update_material_in_out, material_id, material_update)
     if not updated_in_out:
         raise HTTPException(status_code=404, detail="Material not found")
     return updated_in_out
 
 @app.delete("/materials_in_out/{material_id}")
-def delete_in_out(material_id: int, db: Session = Depends(get_db)):
-    deleted_in_out = crud.delete_material_in_out(db, material_id)
+async def delete_in_out(material_id: int, db: AsyncSession = Depends(get_write_db)):
+    deleted_in_out = await db.run_sync(crud.delete_material_in_out, material_id)
     if not deleted_in_out:
         raise HTTPException(status_code=404, detail="Material not found")
     return {"detail": "Material deleted"}
 
 #material_inven_management 엔드포인트
 @app.post("/material_invens/", response_model=schemas.MaterialInvenManagementCreate)
-def create_material_inventory(inventory: schemas.MaterialInvenManagementCreate, db: Session = Depends(get_db)):
-    return crud.create_material_invens(db=db, inventory=inventory)
+async def create_material_inventory(inventory: schemas.MaterialInvenManagementCreate, db: AsyncSession = Depends(get_write_db)):
+    return await db.run_sync(crud.create_material_invens, inventory)
 
-@app.get("/material_invens/all/", response_model=List[schemas.MaterialInvenManagementBase])
-def get_all_material_inventories(db: Session = Depends(get_db)):
-    return crud.get_all_material_invens(db=db)
+@app.post("/material_invens/upsert", response_model=schemas.UpsertResponse)
+async def upsert_material_inventories(rows: List[Any] = Body(...), partial: bool = False, db: AsyncSession = Depends(get_write_db)):
+    return await bulk_upsert(db, schemas.MaterialInvenManagementCreate, crud.upsert_material_invens, rows, partial)
+
+@app.get("/material_invens/all/", response_model=schemas.Page[schemas.MaterialInvenManagementBase])
+async def get_all_material_inventories(page: dict = Depends(page_params), filters: dict = Depends(list_filters), fields: Optional[List[str]] = Depends(fields_param(schemas.MaterialInvenManagementBase)), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_all_material_invens, **page, **filters, fields=fields))
 
 @app.get("/material_invens/{inventory_id}", response_model=schemas.MaterialInvenManagementBase)
-def get_material_inventories(inventory_id: int, db: Session = Depends(get_db)):
-    inventory = crud.get_material_invens(db=db, inventory_id=inventory_id)
+async def get_material_inventories(inventory_id: int, fields: Optional[List[str]] = Depends(fields_param(schemas.MaterialInvenManagementBase)), db: AsyncSession = Depends(get_async_read_db)):
+    inventory = await db.run_sync(crud.get_material_invens, inventory_id, fields)
     if inventory is None:
         raise HTTPException(status_code=404, detail="Inventory not found")
-    return inventory.__dict__
+    return row_response(inventory)
 
 @app.get("/material_invens/month/", response_model=List[schemas.MaterialInvenManagementBase])
-def get_month_material_inventories(year: int, month: int, db: Session = Depends(get_db)):
-    inventory = crud.get_month_material_invens(db, year, month)
-    return inventory
+async def get_month_material_inventories(year: int, month: int, fields: Optional[List[str]] = Depends(fields_param(schemas.MaterialInvenManagementBase)), db: AsyncSession = Depends(get_async_read_db)):
+    inventory = await db.run_sync(crud.get_month_material_invens, year, month, fields)
+    return row_response(inventory)
 
 @app.put("/material_invens/{inventory_id}", response_model=schemas.MaterialInvenManagementUpdate)
-def update_material_invens(inventory_id: int, inventory_update: schemas.MaterialInvenManagementUpdate, db: Session = Depends(get_db)):
-    updated_inventory = crud.update_material_invens(db, inventory_id, inventory_update)
+async def update_material_invens(inventory_id: int, inventory_update: schemas.MaterialInvenManagementUpdate, db: AsyncSession = Depends(get_write_db)):
+    updated_inventory = await db.run_sync(crud.update_material_invens, inventory_id, inventory_update)
     if not updated_inventory:
         raise HTTPException(status_code=404, detail="Inventory not found")
     return updated_inventory
 
 @app.delete("/material_invens/{inventory_id}")
-def delete_material_invens(inventory_id: int, db: Session = Depends(get_db)):
-    deleted_inventory = crud.delete_material_invens(db, inventory_id)
+async def delete_material_invens(inventory_id: int, db: AsyncSession = Depends(get_write_db)):
+    deleted_inventory = await db.run_sync(crud.delete_material_invens, inventory_id)
     if not deleted_inventory:
         raise HTTPException(status_code=404, detail="Inventory not found")
     return {"detail": "Inventory deleted"}
 
 # prediction 엔드포인트
 @app.post("/predictions/mass_production")
-def predict_mass_production(data: schemas.MassProductionInput, db: Session = Depends(get_db)):
-    raw_order_volume = crud.get_history_for_order_volume(db)
-    raw_safety_stock = crud.get_history_for_safety_stock(db)
-
+async def predict_mass_production(data: schemas.MassProductionInput, db: AsyncSession = Depends(get_async_db)):
+    async def compute():
+        raw_order_volume = await db.run_sync(crud.get_history_for_order_volume)
+        raw_safety_stock = await db.run_sync(crud.get_history_for_safety_stock)
+        # 모델 학습은 CPU 작업이므로 이벤트 루프 밖에서 실행
+        return await run_in_threadpool(calculate_mass_production, data, raw_order_volume, raw_safety_stock)
+
+    dependencies = [("productions", None, None), ("inventory_managements", None, None)]
+    return await cached_response("mass_production", data.model_dump(mode="json"), dependencies, compute)
+
+#일괄 예측 결과 조회 (python forecast_batch.py로 미리 계산해서 저장한 값)
+@app.get("/predictions/forecasts")
+async def get_forecasts(group: str = Query("item_number", pattern="^(item_number|line)$"), key: Optional[str] = None, metric: Optional[str] = Query(None, pattern="^(order_volume|safety_stock)$"), db: AsyncSession = Depends(get_async_read_db)):
+    return row_response(await db.run_sync(crud.get_forecasts, group, key, metric))
+
+def calculate_mass_production(data: schemas.MassProductionInput, raw_order_volume: dict, raw_safety_stock: dict):
     dates = sorted(list(raw_order_volume.keys()))[-12:] if raw_order_volume else []
     
     if not dates:
@@ -283,5 +509,76 @@ def predict_mass_production(data: schemas.MassProductionInput, db: Session = Dep
     }
 
 @app.get("/facility_status/{target_date}", response_model=List[schemas.FacilityStatusBase])
-def get_facility_status(target_date: datetime.date, db: Session = Depends(get_db)):
-    return crud.get_facility_status_by_date(db, target_date)
\ No newline at end of file
+async def get_facility_status(target_date: datetime.date, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    # facility_status는 수집기가 직접 쓰므로 카운터는 DB 트리거로 증가 (migrations/005)
+    return await conditional_response(request, db, "facility_status", target_date.year, target_date.month, lambda: db.run_sync(crud.get_facility_status_by_date, target_date))
+
+#대시보드 엔드포인트
+#섹션마다 별도 세션(커넥션)으로 동시에 실행해서 가장 느린 섹션 시간만큼만 걸림
+DASHBOARD_SECTIONS = {
+    "plans": lambda year, target_date: (crud.get_plans_rate_for_year, year),
+    "productions": lambda year, target_date: (crud.get_production_efficiency_for_year, year),
+    "materials": lambda year, target_date: (crud.get_material_rate_for_year, year),
+    "facility_status": lambda year, target_date: (crud.get_facility_status_by_date, target_date),
+}
+
+async def run_section(crud_func, *args):
+    async with read_session() as db:
+        return await db.run_sync(crud_func, *args)
+
+@app.get("/dashboard/{year}", response_model=schemas.DashboardResponse, response_model_exclude_unset=True)
+async def get_dashboard(year: int, sections: Optional[str] = None, date: Optional[datetime.date] = None):
+    names = [name.strip() for name in sections.split(",") if name.strip()] if sections else list(DASHBOARD_SECTIONS)
+    unknown = [name for name in names if name not in DASHBOARD_SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+
+    target_date = date or datetime.date.today()
+    results = await asyncio.gather(*(run_section(*DASHBOARD_SECTIONS[name](year, target_date)) for name in names))
+    return {"year": year, **dict(zip(names, results))}
+
+#엑셀 업로드 엔드포인트 (생산/재고 대장)
+@app.post("/imports/excel")
+async def import_excel(file: UploadFile = File(...), kind: str = Query(..., pattern="^(productions|inventories)$"), sheet: Optional[str] = None):
+    with SessionLocal() as db:
+        try:
+            # openpyxl 파싱은 CPU 작업이므로 threadpool에서 실행
+            return await run_in_threadpool(excel_import.import_workbook, db, file.file, kind, sheet)
+        except (ValueError, KeyError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except excel_import.ImportConflict as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        finally:
+            await response_cache.invalidate_committed(db)
+
+#analytics 엔드포인트 (Arrow IPC / Parquet)
+@app.get("/analytics/{table}")
+async def export_analytics(table: str, columns: str = None, start_date: datetime.date = None, end_date: datetime.date = None, format: str = Query("arrow", pattern="^(arrow|parquet)$")):
+    column_names = [name.strip() for name in columns.split(",") if name.strip()] if columns else None
+    try:
+        stmt = crud.get_analytics_query(table, column_names, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return export_response(stmt, format, table)
+
+#변경 피드 (tables=productions,inventory_managements 처럼 테이블 선택)
+@app.get("/changes")
+async def get_changes(since: Optional[str] = None, tables: Optional[str] = None, limit: int = Query(crud.DEFAULT_PAGE_SIZE, ge=1, le=crud.MAX_PAGE_SIZE), db: AsyncSession = Depends(get_async_read_db)):
+    try:
+        since_idx = crud.decode_cursor(since) if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid token")
+    table_names = [name.strip() for name in tables.split(",") if name.strip()] if tables else None
+    unknown = [name for name in table_names or [] if name not in change_log.TABLES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown tables: {', '.join(unknown)}")
+    return row_response(await db.run_sync(crud.get_changes, since_idx, limit, table_names))
+
+#internal 엔드포인트
+@app.get("/internal/pool")
+async def get_pool():
+    return get_pool_status()
+
+@app.get("/internal/cache")
+async def get_cache():
+    return response_cache.status()
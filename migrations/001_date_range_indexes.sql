@@ -0,0 +1,15 @@
+-- 월/연도 조회(반개구간 날짜 필터)와 item_name 조인에 사용하는 복합 인덱스
+CREATE INDEX ix_plans_year_month ON plans (year, month);
+
+CREATE INDEX ix_productions_date_idx ON productions (date, production_idx);
+CREATE INDEX ix_productions_item_number_date ON productions (item_number, date);
+CREATE INDEX ix_productions_item_name_date ON productions (item_name, date);
+
+CREATE INDEX ix_inventory_managements_date_idx ON inventory_managements (date, inventory_idx);
+CREATE INDEX ix_inventory_managements_item_name_date ON inventory_managements (item_name, date);
+
+CREATE INDEX ix_materials_date_client ON materials (date, client);
+CREATE INDEX ix_materials_item_name ON materials (item_name);
+
+CREATE INDEX ix_material_invens_managements_date_idx ON material_invens_managements (date, materialinvenmanage_idx);
+CREATE INDEX ix_material_invens_managements_item_name_date ON material_invens_managements (item_name, date);
@@ -0,0 +1,7 @@
+-- 낙관적 잠금용 version 컬럼 (수정할 때마다 1씩 증가)
+ALTER TABLE plans ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE productions ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE inventory_managements ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE materials ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE material_in_out_managements ADD COLUMN version INT NOT NULL DEFAULT 1;
+ALTER TABLE material_invens_managements ADD COLUMN version INT NOT NULL DEFAULT 1;
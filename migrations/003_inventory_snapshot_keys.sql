@@ -0,0 +1,21 @@
+-- 일별 재고 스냅샷 중복 제거 후 (date, item_number, account_idx) 유니크 키 추가
+-- 같은 키의 행이 여러 개면 가장 최근에 들어간 행(idx가 가장 큰 행)만 남김
+DELETE older FROM inventory_managements older
+JOIN inventory_managements newer
+  ON older.date = newer.date
+ AND older.item_number = newer.item_number
+ AND older.account_idx = newer.account_idx
+ AND older.inventory_idx < newer.inventory_idx;
+
+ALTER TABLE inventory_managements
+  ADD CONSTRAINT uq_inventory_managements_date_item_account UNIQUE (date, item_number, account_idx);
+
+DELETE older FROM material_invens_managements older
+JOIN material_invens_managements newer
+  ON older.date = newer.date
+ AND older.item_number = newer.item_number
+ AND older.account_idx = newer.account_idx
+ AND older.materialinvenmanage_idx < newer.materialinvenmanage_idx;
+
+ALTER TABLE material_invens_managements
+  ADD CONSTRAINT uq_material_invens_managements_date_item_account UNIQUE (date, item_number, account_idx);
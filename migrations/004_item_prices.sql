@@ -0,0 +1,26 @@
+-- 품목별 월 단가 (그 달 마지막 재고 행의 단가)
+CREATE TABLE item_prices (
+  price_idx INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  source VARCHAR(20) NOT NULL,
+  item_name VARCHAR(100) NOT NULL,
+  period DATE NOT NULL,
+  price FLOAT NULL,
+  CONSTRAINT uq_item_prices_source_item_period UNIQUE (source, item_name, period)
+);
+
+-- 기존 재고 데이터로 채우기 (MySQL 8 window 함수 사용)
+INSERT INTO item_prices (source, item_name, period, price)
+SELECT 'inventory', item_name, period, price FROM (
+  SELECT item_name, price, DATE_FORMAT(date, '%Y-%m-01') AS period,
+         ROW_NUMBER() OVER (PARTITION BY item_name, DATE_FORMAT(date, '%Y-%m-01') ORDER BY date DESC, inventory_idx DESC) AS rn
+  FROM inventory_managements
+  WHERE item_name IS NOT NULL AND date IS NOT NULL AND price IS NOT NULL
+) latest WHERE rn = 1;
+
+INSERT INTO item_prices (source, item_name, period, price)
+SELECT 'material', item_name, period, price FROM (
+  SELECT item_name, price, DATE_FORMAT(date, '%Y-%m-01') AS period,
+         ROW_NUMBER() OVER (PARTITION BY item_name, DATE_FORMAT(date, '%Y-%m-01') ORDER BY date DESC, materialinvenmanage_idx DESC) AS rn
+  FROM material_invens_managements
+  WHERE item_name IS NOT NULL AND date IS NOT NULL AND price IS NOT NULL
+) latest WHERE rn = 1;
@@ -0,0 +1,35 @@
+-- 테이블/월별 변경 카운터 (조회 API의 ETag)
+CREATE TABLE change_watermarks (
+  table_name VARCHAR(50) NOT NULL,
+  year INT NOT NULL,
+  month INT NOT NULL,
+  version INT NOT NULL DEFAULT 1,
+  PRIMARY KEY (table_name, year, month)
+);
+
+-- facility_status는 API를 거치지 않고 수집기가 직접 쓰므로 트리거로 카운터 증가
+DELIMITER //
+CREATE TRIGGER trg_facility_status_insert AFTER INSERT ON facility_status FOR EACH ROW
+BEGIN
+  INSERT INTO change_watermarks (table_name, year, month, version)
+  VALUES ('facility_status', YEAR(NEW.date), MONTH(NEW.date), 1)
+  ON DUPLICATE KEY UPDATE version = version + 1;
+END//
+
+CREATE TRIGGER trg_facility_status_update AFTER UPDATE ON facility_status FOR EACH ROW
+BEGIN
+  INSERT INTO change_watermarks (table_name, year, month, version)
+  VALUES ('facility_status', YEAR(OLD.date), MONTH(OLD.date), 1)
+  ON DUPLICATE KEY UPDATE version = version + 1;
+  INSERT INTO change_watermarks (table_name, year, month, version)
+  VALUES ('facility_status', YEAR(NEW.date), MONTH(NEW.date), 1)
+  ON DUPLICATE KEY UPDATE version = version + 1;
+END//
+
+CREATE TRIGGER trg_facility_status_delete AFTER DELETE ON facility_status FOR EACH ROW
+BEGIN
+  INSERT INTO change_watermarks (table_name, year, month, version)
+  VALUES ('facility_status', YEAR(OLD.date), MONTH(OLD.date), 1)
+  ON DUPLICATE KEY UPDATE version = version + 1;
+END//
+DELIMITER ;
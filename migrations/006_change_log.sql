@@ -0,0 +1,9 @@
+-- 행 단위 변경 기록 (GET /changes 변경 피드)
+CREATE TABLE change_log (
+  change_idx INT NOT NULL AUTO_INCREMENT,
+  table_name VARCHAR(50) NOT NULL,
+  row_id INT NOT NULL,
+  operation VARCHAR(10) NOT NULL,
+  changed_at DATETIME NOT NULL,
+  PRIMARY KEY (change_idx)
+);
@@ -0,0 +1,12 @@
+-- 품번/라인별 일괄 예측 결과 (python forecast_batch.py로 갱신)
+CREATE TABLE forecasts (
+  forecast_idx INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+  group_type VARCHAR(20) NOT NULL,
+  group_key VARCHAR(100) NOT NULL,
+  metric VARCHAR(20) NOT NULL,
+  period DATE NOT NULL,
+  value FLOAT NULL,
+  method VARCHAR(20) NOT NULL,
+  created_at DATETIME NOT NULL,
+  CONSTRAINT uq_forecasts_group_metric_period UNIQUE (group_type, group_key, metric, period)
+);
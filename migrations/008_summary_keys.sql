@@ -0,0 +1,15 @@
+-- 생산계획 요약 (account_idx, year, month) 유니크 키 추가
+-- account_idx가 없는 요약 행은 기본 거래처(1)로 맞추고, 같은 키의 행이 여러 개면 가장 최근 행만 남김
+-- 적용 후 python rebuild_summaries.py 로 남은 행을 원본 기준으로 다시 계산
+UPDATE production_plan_summaries SET account_idx = 1 WHERE account_idx IS NULL;
+
+DELETE older FROM production_plan_summaries older
+JOIN production_plan_summaries newer
+  ON older.account_idx = newer.account_idx
+ AND older.year = newer.year
+ AND older.month = newer.month
+ AND older.summary_idx < newer.summary_idx;
+
+ALTER TABLE production_plan_summaries
+  MODIFY account_idx INT NOT NULL DEFAULT 1,
+  ADD CONSTRAINT uq_production_plan_summaries_account_year_month UNIQUE (account_idx, year, month);
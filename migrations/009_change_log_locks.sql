@@ -0,0 +1,8 @@
+-- 변경 기록 번호 할당 잠금 (change_log.py가 commit 직전에 이 행을 잠그고 change_log에 insert)
+-- change_idx가 commit 순서대로 할당되므로 CHANGE_GAP_TIMEOUT 설정은 더 이상 사용하지 않음
+CREATE TABLE change_log_locks (
+  lock_idx INT NOT NULL,
+  PRIMARY KEY (lock_idx)
+);
+
+INSERT INTO change_log_locks (lock_idx) VALUES (1);
@@ -1,8 +1,11 @@
-from sqlalchemy import Column, Integer, String, Date, Time, Float
+from sqlalchemy import Column, Integer, String, Date, DateTime, Time, Float, Index, UniqueConstraint
 from database import Base
 
 class Plan(Base):
     __tablename__ = "plans"
+    __table_args__ = (
+        Index("ix_plans_year_month", "year", "month"),
+    )
 
     plan_idx = Column(Integer, primary_key=True, index=True)
     year = Column(Integer)
@@ -15,9 +18,15 @@ class Plan(Base):
     process = Column(String(100))
     price = Column(Float)
     account_idx = Column(Integer)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 class Production(Base):
     __tablename__ = "productions"
+    __table_args__ = (
+        Index("ix_productions_date_idx", "date", "production_idx"),
+        Index("ix_productions_item_number_date", "item_number", "date"),
+        Index("ix_productions_item_name_date", "item_name", "date"),
+    )
 
     production_idx = Column(Integer, primary_key=True, index=True)
     date = Column(Date)
@@ -36,9 +45,15 @@ class Production(Base):
     line_efficiency = Column(Integer)
     specification = Column(String(100))
     account_idx = Column(Integer)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 class InventoryManagement(Base):
     __tablename__ = "inventory_managements"
+    __table_args__ = (
+        Index("ix_inventory_managements_date_idx", "date", "inventory_idx"),
+        Index("ix_inventory_managements_item_name_date", "item_name", "date"),
+        UniqueConstraint("date", "item_number", "account_idx", name="uq_inventory_managements_date_item_account"),
+    )
 
     inventory_idx = Column(Integer, primary_key=True, index=True)
     date = Column(Date)
@@ -59,9 +74,14 @@ class InventoryManagement(Base):
     lot_current_quantity = Column(Integer)
     difference_quantity = Column(Integer)
     account_idx = Column(Integer)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 class Material(Base):
     __tablename__ = "materials"
+    __table_args__ = (
+        Index("ix_materials_date_client", "date", "client"),
+        Index("ix_materials_item_name", "item_name"),
+    )
 
     material_idx = Column(Integer, primary_key=True, autoincrement=True)
     date = Column(Date)
@@ -73,6 +93,7 @@ class Material(Base):
     process = Column(String(100))
     quantity = Column(Integer)
     account_idx = Column(Integer)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 class MaterialPlan(Base):
     __tablename__ = "material_plans"
@@ -116,9 +137,15 @@ class MaterialInOutManagement(Base):
     total_amount = Column(Float) 
     purchase_category = Column(String(100))
     account_idx = Column(Integer)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 class MaterialInvenManagement(Base):
     __tablename__ = "material_invens_managements"
+    __table_args__ = (
+        Index("ix_material_invens_managements_date_idx", "date", "materialinvenmanage_idx"),
+        Index("ix_material_invens_managements_item_name_date", "item_name", "date"),
+        UniqueConstraint("date", "item_number", "account_idx", name="uq_material_invens_managements_date_item_account"),
+    )
 
     materialinvenmanage_idx = Column(Integer, primary_key=True, index=True)
     date = Column(Date)
@@ -139,9 +166,13 @@ class MaterialInvenManagement(Base):
     lot_current_quantity = Column(Integer)
     difference_quantity = Column(Integer)
     account_idx = Column(Integer)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 class ProductionPlanSummary(Base):
     __tablename__ = "production_plan_summaries"
+    __table_args__ = (
+        UniqueConstraint("account_idx", "year", "month", name="uq_production_plan_summaries_account_year_month"),
+    )
 
     summary_idx = Column(Integer, primary_key=True, index=True, autoincrement=True)
     year = Column(Integer, index=True)
@@ -152,7 +183,20 @@ class ProductionPlanSummary(Base):
     business_plan = Column(Float, default=0.0)
     business_amount = Column(Float, default=0.0)
     business_achievement_rate = Column(Float, default=0.0)
-    account_idx = Column(Integer, default=1)
+    account_idx = Column(Integer, nullable=False, default=1, server_default="1")
+
+# 품목별 월 단가 (그 달 마지막 재고 행의 단가, 재고 테이블이 바뀔 때 같이 갱신)
+class ItemPrice(Base):
+    __tablename__ = "item_prices"
+    __table_args__ = (
+        UniqueConstraint("source", "item_name", "period", name="uq_item_prices_source_item_period"),
+    )
+
+    price_idx = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(20), nullable=False)
+    item_name = Column(String(100), nullable=False)
+    period = Column(Date, nullable=False)
+    price = Column(Float)
 
 class FacilityStatus(Base):
     __tablename__ = "facility_status"
@@ -161,4 +205,45 @@ class FacilityStatus(Base):
     line = Column(String(50))
     produced_quantity = Column(Float, default=0.0)
     operating_time = Column(Float, default=0.0)
-    non_operating_time = Column(Float, default=0.0)
\ No newline at end of file
+    non_operating_time = Column(Float, default=0.0)
+
+# 품번/라인별 일괄 예측 결과 (forecast_batch.py가 품번/라인 단위로 교체 저장)
+class Forecast(Base):
+    __tablename__ = "forecasts"
+    __table_args__ = (
+        UniqueConstraint("group_type", "group_key", "metric", "period", name="uq_forecasts_group_metric_period"),
+    )
+
+    forecast_idx = Column(Integer, primary_key=True, autoincrement=True)
+    group_type = Column(String(20), nullable=False)
+    group_key = Column(String(100), nullable=False)
+    metric = Column(String(20), nullable=False)
+    period = Column(Date, nullable=False)
+    value = Column(Float)
+    method = Column(String(20), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+# 테이블/월별 변경 카운터 (crud 쓰기마다 1씩 증가, 조회 API의 ETag로 사용)
+class ChangeWatermark(Base):
+    __tablename__ = "change_watermarks"
+
+    table_name = Column(String(50), primary_key=True)
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    month = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(Integer, nullable=False, default=1)
+
+# 행 단위 변경 기록 (오프라인 단말기 동기화용, change_idx 순서가 변경 순서)
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+
+    change_idx = Column(Integer, primary_key=True, autoincrement=True)
+    table_name = Column(String(50), nullable=False)
+    row_id = Column(Integer, nullable=False)
+    operation = Column(String(10), nullable=False)
+    changed_at = Column(DateTime, nullable=False)
+
+# 변경 기록 번호 할당 잠금 (행 하나, commit 직전에 잠가서 change_idx를 commit 순서대로 받음)
+class ChangeLogLock(Base):
+    __tablename__ = "change_log_locks"
+
+    lock_idx = Column(Integer, primary_key=True, autoincrement=False)
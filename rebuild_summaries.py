@@ -0,0 +1,31 @@
+# production_plan_summaries 검증/재계산
+# python rebuild_summaries.py --verify   : 원본 기준 계산값과 저장값 비교만 (차이가 있으면 종료코드 1)
+# python rebuild_summaries.py            : 전체 다시 계산해서 저장
+import argparse
+import sys
+from database import SessionLocal
+import summaries
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify or rebuild production_plan_summaries")
+    parser.add_argument("--verify", action="store_true", help="only compare stored summaries with recomputed values")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        differences = summaries.diff(db)
+        for difference in differences:
+            print(f"{difference['key']}: stored={difference['actual']} rows={difference['rows']} expected={difference['expected']}")
+        print(f"{len(differences)} summary rows differ")
+
+        if args.verify:
+            return 1 if differences else 0
+        if differences:
+            summaries.rebuild(db)
+            print("rebuilt production_plan_summaries")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,50 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Optional, List, Generic, TypeVar, Any
 from datetime import date, time
+import datetime
+from functools import lru_cache
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+class BulkRowError(BaseModel):
+    index: int
+    errors: List[dict]
+
+class BulkInsertResponse(BaseModel):
+    ids: List[Optional[int]]
+    errors: List[BulkRowError] = []
+
+class UpsertResponse(BaseModel):
+    upserted: int
+    errors: List[BulkRowError] = []
+
+class BulkWriteResponse(BaseModel):
+    affected: int
+    dry_run: bool = False
+
+@lru_cache
+def list_adapter(schema):
+    return TypeAdapter(List[schema])
+
+#여러 행을 한 번에 검증하고 (행 번호, 모델) 목록과 행 번호별 오류 목록을 반환
+def validate_rows(schema, rows: List[Any]):
+    adapter = list_adapter(schema)
+    try:
+        return list(enumerate(adapter.validate_python(rows))), []
+    except ValidationError as e:
+        row_errors = {}
+        for error in e.errors(include_url=False):
+            index, *loc = error["loc"]
+            row_errors.setdefault(index, []).append({"loc": loc, "msg": error["msg"], "type": error["type"]})
+
+    valid_indexes = [i for i in range(len(rows)) if i not in row_errors]
+    valid = adapter.validate_python([rows[i] for i in valid_indexes])
+    errors = [BulkRowError(index=index, errors=row_errors[index]) for index in sorted(row_errors)]
+    return list(zip(valid_indexes, valid)), errors
 
 class PlanCreate(BaseModel):
     year: int
@@ -25,6 +69,7 @@ class PlanBase(BaseModel):
     process: str
     price: float
     account_idx: int = 1
+    version: int = 1
 
 class PlanResponse(BaseModel):
     year: int
@@ -53,6 +98,7 @@ class PlanUpdate(BaseModel):
     model: Optional[str] = None
     process: Optional[str] = None
     price: Optional[float] = None
+    version: Optional[int] = None
     
     class Config:
         orm_mode = True
@@ -93,6 +139,7 @@ class ProductionBase(BaseModel):
     line_efficiency: int
     specification: str
     account_idx: int = 1
+    version: int = 1
 
 class ProductionResponse(BaseModel):
     year: int
@@ -101,7 +148,7 @@ class ProductionResponse(BaseModel):
     line_efficiency: int
 
 class ProductionUpdate(BaseModel):
-    date: Optional[date] 
+    date: Optional[datetime.date] = None
     line: Optional[str] = None
     operator: Optional[str] = None
     item_number: Optional[str] = None
@@ -116,6 +163,7 @@ class ProductionUpdate(BaseModel):
     shift: Optional[str] = None
     line_efficiency: Optional[int] = None
     specification: Optional[str] = None
+    version: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -160,25 +208,27 @@ class InventoryManagementBase(BaseModel):
     lot_current_quantity: int
     difference_quantity: int
     account_idx: int = 1
+    version: int = 1
 
 class InventoryManagementUpdate(BaseModel):
-    date: Optional[date]
-    item_number: Optional[str]
-    item_name: Optional[str]
-    price: Optional[float]
-    basic_quantity: Optional[int]
-    basic_amount: Optional[float]
-    in_quantity: Optional[int]
-    in_amount: Optional[float]
-    defective_in_quantity: Optional[int]
-    defective_in_amount: Optional[float]
-    out_quantity: Optional[int]
-    out_amount: Optional[float]
-    adjustment_quantity: Optional[int]
-    current_quantity: Optional[int]
-    current_amount: Optional[float]
-    lot_current_quantity: Optional[int]
-    difference_quantity: Optional[int]
+    date: Optional[datetime.date] = None
+    item_number: Optional[str] = None
+    item_name: Optional[str] = None
+    price: Optional[float] = None
+    basic_quantity: Optional[int] = None
+    basic_amount: Optional[float] = None
+    in_quantity: Optional[int] = None
+    in_amount: Optional[float] = None
+    defective_in_quantity: Optional[int] = None
+    defective_in_amount: Optional[float] = None
+    out_quantity: Optional[int] = None
+    out_amount: Optional[float] = None
+    adjustment_quantity: Optional[int] = None
+    current_quantity: Optional[int] = None
+    current_amount: Optional[float] = None
+    lot_current_quantity: Optional[int] = None
+    difference_quantity: Optional[int] = None
+    version: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -205,6 +255,7 @@ class MaterialBase(BaseModel):
     process: str
     quantity: int
     account_idx: int = 1
+    version: int = 1
 
 class MaterialResponse(BaseModel):
     year: int
@@ -222,7 +273,7 @@ class MaterialResponse2(BaseModel):
     business_achievement_rate: float
 
 class MaterialUpdate(BaseModel):
-    date: Optional[date]
+    date: Optional[datetime.date] = None
     client: Optional[str] = None
     item_number: Optional[str] = None
     item_name: Optional[str] = None
@@ -230,6 +281,7 @@ class MaterialUpdate(BaseModel):
     model: Optional[str] = None
     process: Optional[str] = None
     quantity: Optional[int] = None
+    version: Optional[int] = None
     
     class Config:
         orm_mode = True
@@ -287,9 +339,10 @@ class MaterialInOutManagementBase(BaseModel):
     total_amount: float 
     purchase_category: str
     account_idx: int = 1
+    version: int = 1
 
 class MaterialInOutManagementUpdate(BaseModel):
-    date: Optional[date]
+    date: Optional[datetime.date] = None
     statement_number: Optional[str] = None
     client: Optional[str] = None
     delivery_quantity: Optional[int] = None
@@ -299,6 +352,7 @@ class MaterialInOutManagementUpdate(BaseModel):
     vat: Optional[float] = None
     total_amount: Optional[float] = None
     purchase_category: Optional[str] = None
+    version: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -343,25 +397,27 @@ class MaterialInvenManagementBase(BaseModel):
     lot_current_quantity: int
     difference_quantity: int
     account_idx: int = 1
+    version: int = 1
 
 class MaterialInvenManagementUpdate(BaseModel):
-    date: Optional[date]
-    item_number: Optional[str]
-    item_name: Optional[str]
-    price: Optional[float]
-    basic_quantity: Optional[int]
-    basic_amount: Optional[float]
-    in_quantity: Optional[int]
-    in_amount: Optional[float]
-    defective_in_quantity: Optional[int]
-    defective_in_amount: Optional[float]
-    out_quantity: Optional[int]
-    out_amount: Optional[float]
-    adjustment_quantity: Optional[int]
-    current_quantity: Optional[int]
-    current_amount: Optional[float]
-    lot_current_quantity: Optional[int]
-    difference_quantity: Optional[int]
+    date: Optional[datetime.date] = None
+    item_number: Optional[str] = None
+    item_name: Optional[str] = None
+    price: Optional[float] = None
+    basic_quantity: Optional[int] = None
+    basic_amount: Optional[float] = None
+    in_quantity: Optional[int] = None
+    in_amount: Optional[float] = None
+    defective_in_quantity: Optional[int] = None
+    defective_in_amount: Optional[float] = None
+    out_quantity: Optional[int] = None
+    out_amount: Optional[float] = None
+    adjustment_quantity: Optional[int] = None
+    current_quantity: Optional[int] = None
+    current_amount: Optional[float] = None
+    lot_current_quantity: Optional[int] = None
+    difference_quantity: Optional[int] = None
+    version: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -386,4 +442,11 @@ class FacilityStatusBase(BaseModel):
     non_operating_time: float
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class DashboardResponse(BaseModel):
+    year: int
+    plans: Optional[List[PlanResponse]] = None
+    productions: Optional[List[ProductionResponse]] = None
+    materials: Optional[List[MaterialResponse2]] = None
+    facility_status: Optional[List[FacilityStatusBase]] = None
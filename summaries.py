@@ -0,0 +1,280 @@
+from sqlalchemy import select, func, and_, or_, insert, update, delete, case
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from collections import namedtuple
+from datetime import date
+from models import Plan, Production, ProductionPlanSummary
+
+# production_plan_summaries 유지 (account_idx, year, month 단위, account_idx가 없는 원본 행은 기본 거래처로 집계)
+# prod_plan: 계획 수량 합, business_plan: 계획 수량 * 단가 합
+# prod_amount: 생산 수량 합, business_amount: 생산 수량 * 같은 달 같은 품번의 계획 단가 합
+# 달성률은 실적 / 계획 * 100 (계획이 0이면 0)
+#
+# 원본 행을 쓰기 전에 요약 행을 만들어 두고 잠가서(lock) 같은 키를 쓰는 트랜잭션은 순서대로 처리
+# 생산 행 변경은 수량/금액 차이값만 더하고(Delta), 계획 행 변경은 품번별 단가가 바뀌어 그 달 생산 금액 전체가
+# 달라질 수 있으므로 잠근 뒤 그 키만 다시 계산(Recompute)
+SOURCES = (Plan, Production)
+DEFAULT_ACCOUNT_IDX = 1
+
+Recompute = namedtuple("Recompute", "account_idx year month")
+Delta = namedtuple("Delta", "account_idx year month item_number quantity rows sign")
+
+# 키를 바꿀 수 있는 컬럼
+KEY_FIELDS = {
+    Plan: ("account_idx", "year", "month"),
+    Production: ("account_idx", "date"),
+}
+
+SUMMARY_FIELDS = ("prod_plan", "prod_amount", "prod_achievement_rate", "business_plan", "business_amount", "business_achievement_rate")
+
+def account_of(account_idx):
+    return DEFAULT_ACCOUNT_IDX if account_idx is None else account_idx
+
+def plan_account():
+    return func.coalesce(Plan.account_idx, DEFAULT_ACCOUNT_IDX)
+
+def production_account():
+    return func.coalesce(Production.account_idx, DEFAULT_ACCOUNT_IDX)
+
+def production_year():
+    return func.extract("year", Production.date)
+
+def production_month():
+    return func.extract("month", Production.date)
+
+def month_bounds(year: int, month: int):
+    return date(year, month, 1), date(year + month // 12, month % 12 + 1, 1)
+
+def production_deltas(groups: dict, sign: int):
+    return {Delta(*group, quantity, rows, sign) for group, (quantity, rows) in groups.items()}
+
+def add_to_group(groups: dict, group, quantity, rows: int):
+    total = groups.setdefault(group, [0, 0])
+    total[0] += quantity or 0
+    total[1] += rows
+
+# 새로 넣을 행(dict)의 키
+def keys_for_rows(model, rows):
+    if model is Plan:
+        return {Recompute(account_of(row.get("account_idx")), row["year"], row["month"]) for row in rows}
+    groups = {}
+    for row in rows:
+        if row.get("date") is not None:
+            add_to_group(groups, (account_of(row.get("account_idx")), row["date"].year, row["date"].month, row.get("item_number")), row.get("produced_quantity"), 1)
+    return production_deltas(groups, 1)
+
+# 조건에 맞는 기존 행의 키 (수정/삭제 전에 조회, 생산 행은 빠지는 수량)
+# lock이면 원본 행을 FOR UPDATE로 읽어서 다른 트랜잭션이 commit한 최신 값 기준으로 계산하고 쓰기 전까지 잠가 둠
+def keys_for_query(db: Session, model, conditions: list, lock: bool = False):
+    if model is Plan:
+        stmt = select(plan_account(), Plan.year, Plan.month).where(*conditions).distinct()
+        rows = db.execute(stmt.with_for_update() if lock else stmt)
+        return {Recompute(account_idx, year, month) for account_idx, year, month in rows if year is not None}
+    year, month = production_year(), production_month()
+    stmt = (
+        select(production_account(), year, month, Production.item_number, func.sum(Production.produced_quantity), func.count())
+        .where(*conditions, Production.date.is_not(None))
+        .group_by(production_account(), year, month, Production.item_number)
+    )
+    rows = db.execute(stmt.with_for_update() if lock else stmt)
+    # MySQL은 SUM(int)를 Decimal로 돌려주므로 int로 변환 (단가 float와 곱할 수 있도록)
+    groups = {(account_idx, int(key_year), int(key_month), item_number): [int(quantity or 0), rows] for account_idx, key_year, key_month, item_number, quantity, rows in rows}
+    return production_deltas(groups, -1)
+
+# 수정 후 키: 같은 값으로 일괄 수정하므로 기존 키에서 바뀐 부분만 교체 (생산 행은 더해지는 수량)
+def keys_after_update(model, keys: set, changes: dict):
+    if model is Plan:
+        if not any(field in changes for field in KEY_FIELDS[model]):
+            return set(keys)
+        return {
+            Recompute(account_of(changes["account_idx"]) if "account_idx" in changes else key.account_idx, changes.get("year", key.year), changes.get("month", key.month))
+            for key in keys
+        }
+    groups = {}
+    for key in keys:
+        account_idx = account_of(changes["account_idx"]) if "account_idx" in changes else key.account_idx
+        year, month = key.year, key.month
+        if "date" in changes:
+            # 날짜를 지우면 요약에서 빠짐
+            if changes["date"] is None:
+                continue
+            year, month = changes["date"].year, changes["date"].month
+        quantity = (changes["produced_quantity"] or 0) * key.rows if "produced_quantity" in changes else key.quantity
+        add_to_group(groups, (account_idx, year, month, changes.get("item_number", key.item_number)), quantity, key.rows)
+    return production_deltas(groups, 1)
+
+# (account_idx, year, month)별 다시 계산할 키와 품번별 수량 차이 (차이가 0이면 제외)
+def pending_changes(keys: set):
+    recompute = set()
+    deltas = {}
+    for key in keys:
+        if key.year is None or key.month is None:
+            continue
+        month_key = (key.account_idx, key.year, key.month)
+        if isinstance(key, Recompute):
+            recompute.add(month_key)
+        else:
+            items = deltas.setdefault(month_key, {})
+            items[key.item_number] = items.get(key.item_number, 0) + key.sign * key.quantity
+    deltas = {month_key: {item: quantity for item, quantity in items.items() if quantity} for month_key, items in deltas.items()}
+    return recompute, {month_key: items for month_key, items in deltas.items() if items}
+
+def plan_key_filter(keys):
+    return or_(*[and_(plan_account() == account_idx, Plan.year == year, Plan.month == month) for account_idx, year, month in keys])
+
+def production_key_filter(keys):
+    conditions = []
+    for account_idx, year, month in keys:
+        start_date, end_date = month_bounds(year, month)
+        conditions.append(and_(production_account() == account_idx, Production.date >= start_date, Production.date < end_date))
+    return or_(*conditions)
+
+def summary_key_filter(keys):
+    table = ProductionPlanSummary.__table__
+    return or_(*[and_(table.c.account_idx == account_idx, table.c.year == year, table.c.month == month) for account_idx, year, month in keys])
+
+# 원본 테이블에서 요약값 계산 (keys가 없으면 전체, lock이면 다른 트랜잭션이 commit한 최신 행을 읽도록 공유 잠금 조회)
+def compute(db: Session, keys: set = None, lock: bool = False):
+    plan_stmt = select(
+        plan_account(), Plan.year, Plan.month,
+        func.sum(Plan.inventory), func.sum(Plan.inventory * Plan.price)
+    ).group_by(plan_account(), Plan.year, Plan.month)
+
+    # 품번별 계획 단가 (같은 달 같은 품번 계획이 여러 개면 최대 단가)
+    price_stmt = select(
+        plan_account().label("account_idx"), Plan.year, Plan.month, Plan.item_number, func.max(Plan.price).label("price")
+    ).group_by(plan_account(), Plan.year, Plan.month, Plan.item_number)
+
+    year, month = production_year(), production_month()
+    if keys:
+        plan_stmt = plan_stmt.where(plan_key_filter(keys))
+        price_stmt = price_stmt.where(plan_key_filter(keys))
+    prices = price_stmt.subquery()
+    production_stmt = select(
+        production_account(), year, month,
+        func.sum(Production.produced_quantity),
+        func.sum(Production.produced_quantity * func.coalesce(prices.c.price, 0))
+    ).outerjoin(prices, and_(
+        prices.c.account_idx == production_account(),
+        prices.c.item_number == Production.item_number,
+        prices.c.year == year,
+        prices.c.month == month,
+    )).where(Production.date.is_not(None)).group_by(production_account(), year, month)
+    if keys:
+        production_stmt = production_stmt.where(production_key_filter(keys))
+    if lock:
+        plan_stmt = plan_stmt.with_for_update(read=True)
+        production_stmt = production_stmt.with_for_update(read=True)
+
+    summaries = {}
+    for account_idx, key_year, key_month, prod_plan, business_plan in db.execute(plan_stmt):
+        summary = summaries.setdefault((account_idx, int(key_year), int(key_month)), dict.fromkeys(SUMMARY_FIELDS, 0.0))
+        summary.update(prod_plan=float(prod_plan or 0), business_plan=float(business_plan or 0))
+    for account_idx, key_year, key_month, prod_amount, business_amount in db.execute(production_stmt):
+        summary = summaries.setdefault((account_idx, int(key_year), int(key_month)), dict.fromkeys(SUMMARY_FIELDS, 0.0))
+        summary.update(prod_amount=float(prod_amount or 0), business_amount=float(business_amount or 0))
+
+    for summary in summaries.values():
+        summary["prod_achievement_rate"] = summary["prod_amount"] / summary["prod_plan"] * 100 if summary["prod_plan"] else 0.0
+        summary["business_achievement_rate"] = summary["business_amount"] / summary["business_plan"] * 100 if summary["business_plan"] else 0.0
+    return summaries
+
+# 키마다 0인 요약 행을 만들어 두고(이미 있으면 그대로) FOR UPDATE로 잠금
+# 여러 키를 쓰는 트랜잭션끼리 교착되지 않도록 정렬된 순서로 잠금
+def lock(db: Session, keys: set):
+    recompute, deltas = pending_changes(keys)
+    month_keys = sorted(recompute | set(deltas))
+    if not month_keys:
+        return
+    table = ProductionPlanSummary.__table__
+    rows = [{"account_idx": account_idx, "year": year, "month": month, **dict.fromkeys(SUMMARY_FIELDS, 0.0)} for account_idx, year, month in month_keys]
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update(summary_idx=stmt.table.c.summary_idx)
+    elif dialect_name == "sqlite":
+        stmt = sqlite_insert(table).values(rows).on_conflict_do_nothing(index_elements=["account_idx", "year", "month"])
+    else:
+        raise ValueError(f"upsert not supported for '{dialect_name}'")
+    db.execute(stmt)
+    db.execute(select(table.c.summary_idx).where(summary_key_filter(month_keys)).order_by(table.c.account_idx, table.c.year, table.c.month).with_for_update())
+
+def rate(actual, plan):
+    return case((plan != 0, actual / plan * 100), else_=0.0)
+
+# 잠근 요약 행에 반영 (commit은 호출한 쪽에서)
+def refresh(db: Session, keys: set):
+    recompute, deltas = pending_changes(keys)
+    table = ProductionPlanSummary.__table__
+    if recompute:
+        computed = compute(db, recompute, lock=True)
+        for key in recompute:
+            db.execute(update(table).where(summary_key_filter([key])).values(**computed.get(key, dict.fromkeys(SUMMARY_FIELDS, 0.0))))
+
+    for (account_idx, year, month), items in deltas.items():
+        # 계획 단가를 바꾸는 트랜잭션도 같은 요약 행을 잠그므로 공유 잠금으로 commit된 최신 단가를 읽음
+        prices = dict(db.execute(
+            select(Plan.item_number, func.max(Plan.price))
+            .where(plan_account() == account_idx, Plan.year == year, Plan.month == month, Plan.item_number.in_([item for item in items if item is not None]))
+            .group_by(Plan.item_number)
+            .with_for_update(read=True)
+        ).all())
+        prod_amount = table.c.prod_amount + sum(items.values())
+        business_amount = table.c.business_amount + sum(quantity * float(prices.get(item) or 0) for item, quantity in items.items())
+        # MySQL은 SET을 왼쪽부터 적용하므로 달성률을 먼저 (기존 값 + 차이) 기준으로 계산
+        db.execute(update(table).where(summary_key_filter([(account_idx, year, month)])).ordered_values(
+            (table.c.prod_achievement_rate, rate(prod_amount, table.c.prod_plan)),
+            (table.c.business_achievement_rate, rate(business_amount, table.c.business_plan)),
+            (table.c.prod_amount, prod_amount),
+            (table.c.business_amount, business_amount),
+        ))
+
+def stored(db: Session, keys: set = None):
+    stmt = select(ProductionPlanSummary)
+    if keys:
+        stmt = stmt.where(or_(*[
+            and_(ProductionPlanSummary.account_idx == account_idx, ProductionPlanSummary.year == year, ProductionPlanSummary.month == month)
+            for account_idx, year, month in keys
+        ]))
+    result = {}
+    for summary in db.scalars(stmt):
+        result.setdefault((summary.account_idx, summary.year, summary.month), []).append(summary)
+    return result
+
+def write(db: Session, computed: dict, existing: dict, keys):
+    table = ProductionPlanSummary.__table__
+    for key in keys:
+        values = computed.get(key)
+        rows = existing.get(key, [])
+        # 같은 키로 중복 저장된 행은 하나만 남김
+        for duplicate in rows[1:]:
+            db.execute(delete(table).where(table.c.summary_idx == duplicate.summary_idx))
+        if values is None:
+            if rows:
+                db.execute(delete(table).where(table.c.summary_idx == rows[0].summary_idx))
+        elif rows:
+            db.execute(update(table).where(table.c.summary_idx == rows[0].summary_idx).values(**values))
+        else:
+            account_idx, year, month = key
+            db.execute(insert(table).values(account_idx=account_idx, year=year, month=month, **values))
+
+# 저장된 요약과 원본 기준 계산값 비교 (차이가 나는 키 목록)
+def diff(db: Session, tolerance: float = 1e-6):
+    computed = compute(db)
+    existing = stored(db)
+    differences = []
+    for key in sorted(set(computed) | set(existing), key=lambda k: (k[0] is None, k)):
+        rows = existing.get(key, [])
+        # 원본 행이 모두 지워진 키는 0인 요약 행이 남아 있음
+        expected = computed.get(key, dict.fromkeys(SUMMARY_FIELDS, 0.0) if rows else None)
+        actual = {field: getattr(rows[0], field) or 0.0 for field in SUMMARY_FIELDS} if rows else None
+        if expected is None or actual is None or len(rows) > 1 or any(abs(expected[f] - actual[f]) > tolerance for f in SUMMARY_FIELDS):
+            differences.append({"key": key, "expected": expected, "actual": actual, "rows": len(rows)})
+    return differences
+
+def rebuild(db: Session):
+    computed = compute(db)
+    existing = stored(db)
+    write(db, computed, existing, set(computed) | set(existing))
+    db.commit()
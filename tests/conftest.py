@@ -0,0 +1,6 @@
+import os
+import sys
+
+# database 모듈은 import할 때 엔진을 만들므로 먼저 테스트용 sqlite 주소를 지정
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
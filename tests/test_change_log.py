@@ -0,0 +1,51 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+import change_log
+from database import Base
+from models import ChangeLog, Production
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+def logged(engine):
+    with Session(engine) as db:
+        return db.execute(select(ChangeLog.change_idx, ChangeLog.row_id).order_by(ChangeLog.change_idx)).all()
+
+# change_idx는 기록한 순서가 아니라 commit 순서대로 할당
+def test_change_idx_follows_commit_order(engine):
+    with Session(engine) as first, Session(engine) as second:
+        change_log.record(first, Production, [1], "update")
+        change_log.record(second, Production, [2], "update")
+        assert logged(engine) == []
+        second.commit()
+        first.commit()
+    assert [row_id for _, row_id in logged(engine)] == [2, 1]
+
+def test_rollback_discards_pending_changes(engine):
+    with Session(engine) as db:
+        db.add(Production(produced_quantity=1))
+        db.flush()
+        change_log.record(db, Production, [1], "insert")
+        db.rollback()
+        db.commit()
+    assert logged(engine) == []
+
+# 비어 있는 번호(rollback된 번호)를 기다리지 않고 commit된 기록은 바로 전달
+def test_gap_is_not_waited_on(engine):
+    with Session(engine) as db:
+        db.execute(insert(ChangeLog.__table__), [
+            {"change_idx": 1, "table_name": "productions", "row_id": 1, "operation": "delete", "changed_at": datetime.now()},
+            {"change_idx": 3, "table_name": "productions", "row_id": 2, "operation": "delete", "changed_at": datetime.now()},
+        ])
+        db.commit()
+        feed = change_log.get_changes(db, 0, 10)
+        assert [change["id"] for change in feed["changes"]] == [1, 2]
+        assert feed["last"] == change_log.head(db) == 3
+        assert feed["has_more"] is False
@@ -0,0 +1,56 @@
+import warnings
+import numpy as np
+import pytest
+from statsmodels.tsa.holtwinters import SimpleExpSmoothing, Holt
+import forecasting
+
+# NumPy 예측과 statsmodels / 기존 반복문 구현 비교
+STEPS = 6
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).uniform(50, 500, (50, 12))
+
+# 기존 이동평균법 구현 (예측값을 이어 붙이면서 마지막 3개 평균)
+def list_moving_average(values, steps):
+    temp_list = list(values)
+    for _ in range(steps):
+        temp_list.append(sum(temp_list[-3:]) / 3)
+    return temp_list[-steps:]
+
+def test_simple_exp_smoothing_matches_statsmodels(values):
+    result = forecasting.simple_exp_smoothing_forecast(values, STEPS)
+    expected = [
+        SimpleExpSmoothing(row, initialization_method="known", initial_level=row[0]).fit(smoothing_level=0.2, optimized=False).forecast(STEPS)
+        for row in values
+    ]
+    assert result.shape == (len(values), STEPS)
+    assert np.allclose(result, expected)
+
+def test_holt_matches_statsmodels(values):
+    result = forecasting.holt_forecast(values, STEPS)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = [
+            Holt(row, initialization_method="known", initial_level=row[0], initial_trend=row[1] - row[0])
+            .fit(smoothing_level=0.2, smoothing_trend=0.1, optimized=False).forecast(STEPS)
+            for row in values
+        ]
+    assert np.allclose(result, expected)
+
+def test_moving_average_matches_list_loop(values):
+    result = forecasting.moving_average_forecast(values, STEPS)
+    assert np.allclose(result, [list_moving_average(row, STEPS) for row in values])
+
+def test_naive_repeats_last_value(values):
+    result = forecasting.naive_forecast(values, STEPS)
+    assert np.allclose(result, [[row[-1]] * STEPS for row in values])
+
+@pytest.mark.parametrize("method", ["ARIMA", "지수평활법", "이동평균법", "naive"])
+def test_short_history_uses_mean(method):
+    forecasting.forecasts.clear()
+    result = forecasting.calculate_forecast({"2024-01": 10, "2024-02": 21}, method, 3)
+    assert result == {"2024-03": 15, "2024-04": 15, "2024-05": 15}
+
+    values = np.array([[10.0, 21.0], [4.0, 6.0]])
+    assert np.allclose(forecasting.forecast_values(values, method, 3), [[15.5] * 3, [5.0] * 3])
@@ -0,0 +1,60 @@
+import random
+from datetime import date
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+import crud
+from database import Base
+from models import InventoryManagement, Production
+
+# DB 월별 집계와 기존 pandas resample 구현 비교
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+def random_date(rng: random.Random):
+    return date(rng.choice((2023, 2024)), rng.choice((1, 2, 3, 5, 6, 9, 12)), rng.randint(1, 28))
+
+@pytest.fixture
+def filled(db):
+    rng = random.Random(0)
+    db.execute(insert(Production), [
+        {"date": random_date(rng) if rng.random() > 0.05 else None, "produced_quantity": rng.choice((None, rng.randint(0, 500)))}
+        for _ in range(300)
+    ])
+    db.execute(insert(InventoryManagement), [
+        {"date": random_date(rng), "current_quantity": rng.choice((None, rng.randint(0, 500)))}
+        for _ in range(300)
+    ])
+    db.commit()
+    return db
+
+# 기존 구현: 전체 행을 읽어서 pandas로 월별 합계 / 월말 값
+def pandas_order_volume(db: Session):
+    df = pd.DataFrame([{"date": p.date, "quantity": p.produced_quantity} for p in db.query(Production).all()])
+    df["date"] = pd.to_datetime(df["date"])
+    df_monthly = df.set_index("date").resample("M").sum().reset_index()
+    return {row["date"].strftime("%Y-%m"): int(row["quantity"]) for _, row in df_monthly.iterrows()}
+
+def pandas_safety_stock(db: Session):
+    data = db.query(InventoryManagement).order_by(InventoryManagement.date, InventoryManagement.inventory_idx).all()
+    df = pd.DataFrame([{"date": inv.date, "quantity": inv.current_quantity} for inv in data])
+    df["date"] = pd.to_datetime(df["date"])
+    df_monthly = df.set_index("date").resample("M").last().reset_index()
+    df_monthly["quantity"] = df_monthly["quantity"].ffill().fillna(0)
+    return {row["date"].strftime("%Y-%m"): int(row["quantity"]) for _, row in df_monthly.iterrows()}
+
+def test_order_volume_matches_pandas(filled):
+    assert crud.get_history_for_order_volume(filled) == pandas_order_volume(filled)
+
+def test_safety_stock_matches_pandas(filled):
+    assert crud.get_history_for_safety_stock(filled) == pandas_safety_stock(filled)
+
+def test_empty_history(db):
+    assert crud.get_history_for_order_volume(db) == {}
+    assert crud.get_history_for_safety_stock(db) == {}
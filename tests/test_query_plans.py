@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+import crud
+from database import Base
+
+# 월/연도 조회가 날짜 범위 인덱스를 타는지 sqlite EXPLAIN QUERY PLAN으로 확인 (migrations/001)
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+# 조회 함수가 실행한 SELECT의 실행 계획
+def query_plan(db: Session, crud_func, *args):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        crud_func(db, *args)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = next((s, p) for s, p in statements if s.lstrip().upper().startswith("SELECT"))
+    rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    return [row[-1] for row in rows]
+
+@pytest.mark.parametrize("crud_func, args, index", [
+    (crud.get_production_year, (2024,), "ix_productions_date_idx"),
+    (crud.get_month_inventory, (2024, 1), "ix_inventory_managements_date_idx"),
+    (crud.get_month_material_invens, (2024, 1), "ix_material_invens_managements_date_idx"),
+])
+def test_month_queries_use_date_index(db, crud_func, args, index):
+    plan = query_plan(db, crud_func, *args)
+    assert any(index in detail for detail in plan), plan
+    assert not any(detail.startswith("SCAN") for detail in plan), plan
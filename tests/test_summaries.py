@@ -0,0 +1,79 @@
+from datetime import date
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+import crud
+import schemas
+import summaries
+from database import Base
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine, autoflush=False) as session:
+        yield session
+    engine.dispose()
+
+def plan(item_number: str, month: int, inventory: int, price: float, account_idx: int = 1):
+    return schemas.PlanCreate(
+        year=2024, month=month, item_number=item_number, item_name=item_number, inventory=inventory,
+        model="M", process="P", price=price, account_idx=account_idx,
+    )
+
+def production(item_number: str, day: date, quantity: int, account_idx: int = 1):
+    return schemas.ProductionCreate(
+        date=day, line="L1", operator="op", item_number=item_number, item_name=item_number, model="M",
+        target_quantity=100, produced_quantity=quantity, production_efficiency=90, process="P",
+        shift="주간", line_efficiency=90, specification="S", account_idx=account_idx,
+    )
+
+# 계획/생산 추가, 수정, 삭제, 일괄 수정/삭제를 섞어도 저장된 요약이 원본 기준 계산값과 같아야 함
+def test_mixed_writes_keep_summaries_consistent(db):
+    crud.create_plan(db, plan("A", 1, 100, 10.0))
+    crud.create_plan(db, plan("B", 1, 50, 20.0))
+    b_plan = crud.create_plan(db, plan("B", 2, 80, 5.0))
+    crud.create_plan(db, plan("A", 1, 30, 12.0, account_idx=2))
+    assert summaries.diff(db) == []
+
+    first = crud.create_production(db, production("A", date(2024, 1, 5), 40))
+    crud.create_productions_bulk(db, [
+        production("A", date(2024, 1, 6), 25),
+        production("B", date(2024, 1, 7), 10),
+        production("B", date(2024, 2, 3), 60),
+        production("C", date(2024, 2, 4), 7),
+        production("A", date(2024, 1, 8), 15, account_idx=2),
+    ])
+    assert summaries.diff(db) == []
+
+    # 생산 수량 변경, 다른 달/거래처/품번으로 이동
+    crud.update_production(db, first["production_idx"], schemas.ProductionUpdate(produced_quantity=55))
+    crud.update_production(db, first["production_idx"], schemas.ProductionUpdate(date=date(2024, 2, 10), item_number="B"))
+    crud.update_production(db, first["production_idx"], schemas.ProductionUpdate(account_idx=2))
+    assert summaries.diff(db) == []
+
+    # 계획 단가 변경은 그 달 생산 금액 전체를 다시 계산
+    crud.update_plan(db, b_plan["plan_idx"], schemas.PlanUpdate(price=9.0))
+    crud.update_plan(db, b_plan["plan_idx"], schemas.PlanUpdate(month=1))
+    assert summaries.diff(db) == []
+
+    crud.bulk_update_productions(db, {"item_number": "B"}, schemas.ProductionUpdate(produced_quantity=3))
+    crud.bulk_update_productions(db, {"start_date": date(2024, 2, 1)}, schemas.ProductionUpdate(date=date(2024, 1, 20)))
+    assert summaries.diff(db) == []
+
+    crud.delete_production(db, first["production_idx"])
+    crud.delete_plan(db, b_plan["plan_idx"])
+    crud.bulk_delete_productions(db, {"item_number": "A"})
+    assert summaries.diff(db) == []
+
+# 수정/삭제 전 원본 행은 요약 행을 잠근 뒤 FOR UPDATE로 다시 읽어야 함 (잠금을 기다리는 동안 commit된 값을 반영)
+def test_pre_image_is_locked_after_summary_lock(db, monkeypatch):
+    row = crud.create_production(db, production("A", date(2024, 1, 5), 90))
+    calls = []
+    lock, keys_for_query = summaries.lock, summaries.keys_for_query
+    monkeypatch.setattr(summaries, "lock", lambda session, keys: (calls.append("lock"), lock(session, keys))[1])
+    monkeypatch.setattr(summaries, "keys_for_query", lambda session, model, conditions, locked=False: (calls.append(("read", locked)), keys_for_query(session, model, conditions, locked))[1])
+
+    crud.update_production(db, row["production_idx"], schemas.ProductionUpdate(produced_quantity=100))
+    assert calls == [("read", False), "lock", ("read", True), "lock"]
+    assert summaries.diff(db) == []
@@ -0,0 +1,55 @@
+from datetime import date
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+import crud
+import schemas
+from database import Base
+from models import InventoryManagement
+
+# sqlite ON CONFLICT upsert: 같은 (date, item_number, account_idx) 배치를 다시 보내면 행이 늘지 않고 덮어씀
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine, autoflush=False) as session:
+        yield session
+    engine.dispose()
+
+def inventory(item_number: str, day: date, current_quantity: int, account_idx: int = 1):
+    return schemas.InventoryManagementCreate(
+        date=day, item_number=item_number, item_name=item_number, price=10.0,
+        basic_quantity=0, basic_amount=0, in_quantity=0, in_amount=0, defective_in_quantity=0, defective_in_amount=0,
+        out_quantity=0, out_amount=0, adjustment_quantity=0, current_quantity=current_quantity,
+        current_amount=current_quantity * 10.0, lot_current_quantity=0, difference_quantity=0, account_idx=account_idx,
+    )
+
+def snapshot(db: Session):
+    rows = db.execute(select(
+        InventoryManagement.date, InventoryManagement.item_number, InventoryManagement.account_idx,
+        InventoryManagement.current_quantity, InventoryManagement.version,
+    ).order_by(InventoryManagement.inventory_idx)).all()
+    return [tuple(row) for row in rows]
+
+def test_upsert_same_batch_twice_updates_in_place(db):
+    batch = [
+        inventory("A", date(2024, 1, 31), 10),
+        inventory("B", date(2024, 1, 31), 20),
+        inventory("A", date(2024, 1, 31), 30, account_idx=2),
+    ]
+    assert crud.upsert_inventories(db, batch) == 3
+    first = snapshot(db)
+    assert [row[-1] for row in first] == [1, 1, 1]
+
+    changed = [inventory(row.item_number, row.date, row.current_quantity + 5, row.account_idx) for row in batch]
+    assert crud.upsert_inventories(db, changed) == 3
+    second = snapshot(db)
+
+    assert db.execute(select(func.count()).select_from(InventoryManagement)).scalar() == 3
+    assert [row[:3] for row in second] == [row[:3] for row in first]
+    assert [row[3] for row in second] == [15, 25, 35]
+    assert [row[4] for row in second] == [2, 2, 2]
+
+    # 같은 값으로 다시 보내도 행 수는 그대로, version만 증가
+    crud.upsert_inventories(db, changed)
+    assert [row[3:] for row in snapshot(db)] == [(15, 3), (25, 3), (35, 3)]
@@ -0,0 +1,40 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from models import ChangeWatermark
+# 키는 응답 캐시와 같은 (테이블, 연도, 월)
+from cache import SOURCES, keys_for_rows, keys_for_query, keys_after_update
+
+# 쓰기와 같은 트랜잭션에서 바뀐 (테이블, 연도, 월)의 카운터를 1 증가
+# (여러 키를 같은 순서로 잠그도록 정렬)
+def refresh(db: Session, keys: set):
+    if not keys:
+        return
+    table = ChangeWatermark.__table__
+    rows = [{"table_name": name, "year": year, "month": month, "version": 1} for name, year, month in sorted(keys)]
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        stmt = stmt.on_duplicate_key_update(version=table.c.version + 1)
+    else:
+        stmt = sqlite_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=["table_name", "year", "month"], set_={"version": table.c.version + 1})
+    db.execute(stmt)
+
+def version(db: Session, table_name: str, year: int, month: int):
+    return db.execute(
+        select(ChangeWatermark.version).where(
+            ChangeWatermark.table_name == table_name,
+            ChangeWatermark.year == year,
+            ChangeWatermark.month == month,
+        )
+    ).scalar() or 0
+
+def etag(db: Session, table_name: str, year: int, month: int):
+    return f'W/"{table_name}-{year}-{month}-{version(db, table_name, year, month)}"'
+
+def etag_matches(if_none_match: str, etag: str):
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags